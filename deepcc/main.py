@@ -1,3 +1,4 @@
+import os
 import sys
 import pickle
 import random
@@ -6,6 +7,10 @@ import datetime
 import argparse
 from agent import Agent, Actor, Critic
 from util import *
+# the event log and bandwidth estimators are shared with the agents of proto
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'proto'))
+from eventlog import EventLog, add_arguments as add_log_arguments
+import estimator
 
 # increase cwnd and line rate, if NIC bandwidth increses
 parser = argparse.ArgumentParser(description='Run DeepCC Agent')
@@ -17,6 +22,8 @@ parser.add_argument('--line_rate', type=int, default=20, metavar='L',
                     help='set the line rate (Gbit/s) based on avaiable bandwidth (1 Mbit/s = 1e6/8 bytes/s)') # 125_000_000
 parser.add_argument('--offline', action="store_true",
                     help='if offline, samples stored in pkl, and dont learn the model') # 125_000_000
+estimator.add_arguments(parser)
+add_log_arguments(parser)
 
 def scale_up(a):
     high = parser.parse_args().line_rate * 125000000
@@ -35,9 +42,10 @@ def scale_down(a):
     return (a - b) / k
 
 class DeepFlow():
-    def __init__(self, datapath, datapath_info, args):
+    # log: eventlog.EventLog of the agent
+    def __init__(self, datapath, datapath_info, args, log):
         self.args = args
-        print(args.offline)
+        self.log = log
 
         self.dp = datapath
         self.dp_info = datapath_info
@@ -45,10 +53,13 @@ class DeepFlow():
         self.ddpg = Agent(**params)
         if args.offline is False:
             self.ddpg.load_trained_actor()
-            print("Load Actor Model")
+            self.log.info("actor", self.dp_info.sock_id, self.dp_info.src_ip, self.dp_info.dst_ip)
 
         # decide initial rate as line rate
         self.rate = int(args.line_rate * 125000000) # line rate 20Gbps
+        # bottleneck bandwidth from the reported rates, logged with each report; None for line rate
+        self.estimator = estimator.from_args(args)
+        self.bottle_e = self.rate
         self.cwnd = int(args.init_cwnd * self.dp_info.mss)
 
         self.dp.set_program("default", [("Rate", self.rate), ("Cwnd", self.cwnd), ("time_slot_us", args.interval * 1000)])
@@ -61,7 +72,9 @@ class DeepFlow():
         self.report_counter = 1
 
     def on_report(self, r):
-        print("receive report: ", self.dp_info.sock_id, self.dp_info.src_ip, self.dp_info.dst_ip)
+        if self.estimator is not None:
+            self.bottle_e = min(int(self.estimator.update(r.rate)), self.rate)
+        self.log.debug("report", self.dp_info.sock_id, self.dp_info.src_ip, self.dp_info.dst_ip, rate=r.rate, e=self.bottle_e)
         self.report_counter += 1
 
         # fetch from report
@@ -87,7 +100,7 @@ class DeepFlow():
                 if self.report_counter % self.record == 0:
                     with open(self.ddpg.exp_path, "wb") as fo:
                         self.buffer = pickle.dump(self.exp_memory, fo)
-                        print("samples dump into pkl")
+                        self.log.info("dump", self.dp_info.sock_id, self.dp_info.src_ip, self.dp_info.dst_ip, n=len(self.exp_memory))
 
         else: # online
             # rescale to sending rate
@@ -95,14 +108,16 @@ class DeepFlow():
             new_rate = scale_up(a_)
 
         self.dp.update_field("Rate", int(new_rate)) # udpate a_ into datapath
+        self.log.info("rate", self.dp_info.sock_id, self.dp_info.src_ip, self.dp_info.dst_ip, rate=int(new_rate))
 
         self.s = s_
         self.a = a_ 
     
 class DeepCC(portus.AlgBase):
-    def __init__(self, args):
+    def __init__(self, args, log):
         portus.AlgBase.__init__(self)
         self.args = args
+        self.log = log
         print("DeepCC Agent Starts ...")
 
     def datapath_programs(self):
@@ -140,12 +155,13 @@ class DeepCC(portus.AlgBase):
 
 
     def new_flow(self, datapath, datapath_info):
-        print("receive new flow: ", datapath_info.sock_id, datapath_info.src_ip, datapath_info.dst_ip)
-        return DeepFlow(datapath, datapath_info, self.args)
+        self.log.info("flow", datapath_info.sock_id, datapath_info.src_ip, datapath_info.dst_ip)
+        return DeepFlow(datapath, datapath_info, self.args, self.log)
 
 
 if __name__ == '__main__':
     args = parser.parse_args()
+    log = EventLog.from_args(args)
 
-    agent = DeepCC(args)
+    agent = DeepCC(args, log)
     portus.start("netlink", agent)
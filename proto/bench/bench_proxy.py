@@ -0,0 +1,67 @@
+"""
+    Micro benchmark of the agent to switch rpc, a new channel per call (the old proxy)
+    against the pooled persistent channel, on a switch served in this process.
+"""
+import os
+import sys
+import time
+import argparse
+import grpc
+from concurrent import futures
+
+parser = argparse.ArgumentParser(description='Benchmark proxy per-call latency')
+parser.add_argument('--calls', type=int, default=2000, metavar='N',
+                    help='rpc calls per mode')
+parser.add_argument('--port', type=str, default="50199", metavar='P',
+                    help='local port of the benchmark switch')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def start_switch(port):
+    import scheduler
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=15))
+    scheduler.switch_pb2_grpc.add_ChannelServicer_to_server(scheduler.Channel(), server)
+    server.add_insecure_port("127.0.0.1:" + port)
+    server.start()
+    return scheduler, server
+
+
+def fresh_fetch(scheduler, target, request):
+    with grpc.insecure_channel(target) as channel:
+        return scheduler.switch_pb2_grpc.ChannelStub(channel).fetch(request)
+
+
+def report(name, latencies):
+    latencies.sort()
+    print("%-8s mean %7.3f ms  p50 %7.3f ms  p99 %7.3f ms" % (name, sum(latencies) / len(latencies),
+          latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]))
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    scheduler, server = start_switch(args.port)
+    from proxy import Proxy
+
+    srcip, dstip = "10.28.1.18", "10.28.1.19"
+    request = scheduler.switch_pb2.request(srcip=srcip, dstip=dstip, status=0, e=20 * 125000000)
+    target = "127.0.0.1:" + args.port
+    fresh_fetch(scheduler, target, request) # warm up the server
+
+    latencies = []
+    for _ in range(args.calls):
+        start = time.perf_counter()
+        fresh_fetch(scheduler, target, request)
+        latencies.append((time.perf_counter() - start) * 1000)
+    report("fresh", latencies)
+
+    proxy = Proxy("127.0.0.1", args.port)
+    proxy.fetch_newrate(srcip, dstip, 0, 20 * 125000000)
+    latencies = []
+    for _ in range(args.calls):
+        start = time.perf_counter()
+        proxy.fetch_newrate(srcip, dstip, 0, 20 * 125000000)
+        latencies.append((time.perf_counter() - start) * 1000)
+    report("pooled", latencies)
+
+    server.stop(0)
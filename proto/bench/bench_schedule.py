@@ -0,0 +1,76 @@
+"""
+    Micro benchmark of the switch scheduling engine (cost generation + allocation per fetch),
+    on a synthetic star topology with many transmissions.
+"""
+import os
+import sys
+import time
+import argparse
+import importlib
+
+parser = argparse.ArgumentParser(description='Benchmark switch scheduling per fetch')
+parser.add_argument('--num_slot', type=int, nargs='+', default=[10, 20, 50, 100], metavar='K',
+                    help='values of K to benchmark')
+parser.add_argument('--num_host', type=int, default=50, metavar='H',
+                    help='hosts attached to the emulated switch, one link each')
+parser.add_argument('--flows_per_host', type=int, default=8, metavar='F',
+                    help='cross machine transmissions started by each host')
+parser.add_argument('--rounds', type=int, default=3, metavar='R',
+                    help='fetch every transmission R times per K')
+parser.add_argument('--allocator', type=str, default='greedy', choices=['greedy', 'waterfill'],
+                    help='slot allocator of the switch under test')
+parser.add_argument('--switch_dir', type=str, default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'),
+                    help='directory holding the switch.py under test, e.g. an older checkout for A/B')
+
+
+# scheduler.py of the checkout, or switch.py of one from before it was split out, which parses its arguments at import
+def load_switch(switch_dir):
+    sys.path.insert(0, os.path.abspath(switch_dir))
+    if not os.path.exists(os.path.join(switch_dir, "scheduler.py")):
+        argv = sys.argv
+        sys.argv = argv[:1]
+        try:
+            return importlib.import_module("switch")
+        finally:
+            sys.argv = argv
+    return importlib.import_module("scheduler")
+
+
+# fill the switch tables with hosts on a star, each host sending to its next F neighbours
+def build_tables(scheduler, num_host, flows_per_host):
+    scheduler.flow_tensor_table.clear()
+    scheduler.link_id_tabel.clear()
+    hosts = ["10.0.%d.%d" % (h // 250, h % 250 + 1) for h in range(num_host)]
+    trans = []
+    for h, srcip in enumerate(hosts):
+        for j in range(1, flows_per_host + 1):
+            dstip = hosts[(h + j) % num_host]
+            scheduler.flow_tensor_table[srcip][dstip] = ("vgg19", 549)
+            scheduler.link_id_tabel[srcip][dstip] = [h, (h + j) % num_host]
+            trans.append((srcip, dstip))
+    return trans
+
+
+def run(scheduler, k, trans, rounds, allocator):
+    scheduler.K = k
+    scheduler.ALLOCATOR = allocator
+    load_table = scheduler.LoadTable()
+    protocol = scheduler.Proto()
+    e = 20 * 125000000
+    volume = 549 * 1e9 / scheduler.TIME_SLOT * scheduler.VOLUME_INCREASE_FACTOR
+
+    start = time.process_time()
+    for _ in range(rounds):
+        for srcip, dstip in trans:
+            costs = load_table.generate_costs(srcip, dstip)
+            protocol.init_scheduling(costs, e, volume, load_table.trans_schedule[srcip][dstip])
+    return (time.process_time() - start) / (rounds * len(trans)) * 1e6
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    scheduler = load_switch(args.switch_dir)
+    trans = build_tables(scheduler, args.num_host, args.flows_per_host)
+    print("switch: %s, transmissions: %d" % (os.path.abspath(scheduler.__file__), len(trans)))
+    for k in args.num_slot:
+        print("K = %3d: %8.1f us cpu per fetch" % (k, run(scheduler, k, trans, args.rounds, args.allocator)))
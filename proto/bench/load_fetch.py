@@ -0,0 +1,106 @@
+"""
+    Load generator for the switch fetch rpc. Starts switch.py locally with the chosen
+    server mode, drives fetch from many simulated agents and reports fetch/s and latency.
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+import multiprocessing
+import grpc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SWITCH_DIR = os.path.join(BENCH_DIR, '..')
+sys.path.insert(0, SWITCH_DIR)
+import switch_pb2
+import switch_pb2_grpc
+from utils_p1p1 import flow_tensor_table
+
+parser = argparse.ArgumentParser(description='Drive fetch load against a local switch')
+parser.add_argument('--server', type=str, default='thread', choices=['thread', 'aio'],
+                    help='server mode of the switch under test')
+parser.add_argument('--shards', type=int, default=0, metavar='N',
+                    help='worker processes of a sharded switch, 0 for one process')
+parser.add_argument('--agents', type=int, default=8, metavar='A',
+                    help='agent processes, each with its own channel')
+parser.add_argument('--concurrency', type=int, default=4, metavar='C',
+                    help='in-flight fetches per agent')
+parser.add_argument('--duration', type=float, default=10, metavar='S',
+                    help='seconds of load')
+parser.add_argument('--port', type=str, default="50198", metavar='P',
+                    help='local port of the switch under test')
+
+
+def start_switch(server, port, extra=()):
+    proc = subprocess.Popen([sys.executable, os.path.join(SWITCH_DIR, "switch.py"), "--server", server,
+                             "--ip", "127.0.0.1", "--port", port] + list(extra), stdout=subprocess.DEVNULL)
+    with grpc.insecure_channel("127.0.0.1:" + port) as channel:
+        grpc.channel_ready_future(channel).result(timeout=30)
+    return proc
+
+
+def percentile(latencies, p):
+    return latencies[min(int(len(latencies) * p), len(latencies) - 1)]
+
+
+# one agent: C threads on a shared channel, each fetching back to back until the deadline
+def agent(target, concurrency, deadline, trans, results):
+    import threading
+    channel = grpc.insecure_channel(target)
+    stub = switch_pb2_grpc.ChannelStub(channel)
+    latencies = []
+    lock = threading.Lock()
+
+    def loop(offset):
+        local = []
+        i = offset
+        while time.time() < deadline:
+            srcip, dstip = trans[i % len(trans)]
+            request = switch_pb2.request(srcip=srcip, dstip=dstip, status=(i // len(trans)) % 2, e=20 * 125000000)
+            start = time.perf_counter()
+            stub.fetch(request)
+            local.append((time.perf_counter() - start) * 1000)
+            i += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=loop, args=(c,)) for c in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    channel.close()
+    results.put(latencies)
+
+
+# trans: [(srcip, dstip)] fetched round robin, the static tables by default
+def run_load(target, agents, concurrency, duration, trans=None):
+    if trans is None:
+        trans = [(srcip, dstip) for srcip in flow_tensor_table for dstip in flow_tensor_table[srcip]]
+    results = multiprocessing.Queue()
+    deadline = time.time() + duration
+    procs = [multiprocessing.Process(target=agent, args=(target, concurrency, deadline, trans[a:] + trans[:a], results))
+             for a in range(agents)]
+    for p in procs:
+        p.start()
+    latencies = []
+    for _ in procs:
+        latencies.extend(results.get())
+    for p in procs:
+        p.join()
+    latencies.sort()
+    return latencies
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    proc = start_switch(args.server, args.port, ["--shards", str(args.shards)])
+    try:
+        latencies = run_load("127.0.0.1:" + args.port, args.agents, args.concurrency, args.duration)
+    finally:
+        proc.terminate()
+        proc.wait()
+    print("server %s, %d shards, %d agents x %d in flight: %.0f fetch/s, p50 %.3f ms, p99 %.3f ms, p999 %.3f ms" % (
+        args.server, args.shards, args.agents, args.concurrency, len(latencies) / args.duration,
+        percentile(latencies, 0.5), percentile(latencies, 0.99), percentile(latencies, 0.999)))
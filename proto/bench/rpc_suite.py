@@ -0,0 +1,160 @@
+"""
+    Benchmark suite of the switch rpc path. For every combination of flow count, slot length
+    and K it starts switch.py locally, registers the flows as one job, and drives fetch from
+    many agent processes (load_fetch), reporting throughput and p50/p99/p999 latency. The cpu
+    of one fetch is then split in process into request parsing, generate_costs, allocation,
+    the rest of the fetch and reply serialization, on a table holding the same flows.
+
+    Results are printed and written as json, with the commit they were measured at, e.g.
+        python bench/rpc_suite.py --flows 16 256 --num_slot 10 50 --json results.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import collections
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+from load_fetch import SWITCH_DIR, start_switch, run_load, percentile
+import switch_pb2
+from proxy import Proxy
+
+parser = argparse.ArgumentParser(description='Benchmark the switch rpc path')
+parser.add_argument('--flows', type=int, nargs='+', default=[16, 256], metavar='F',
+                    help='transmissions registered on the switch, fetched round robin')
+parser.add_argument('--time_slot', type=int, nargs='+', default=[80], metavar='T',
+                    help='slot lengths (ms) of the switch under test')
+parser.add_argument('--num_slot', type=int, nargs='+', default=[10, 50], metavar='K',
+                    help='values of K of the switch under test')
+parser.add_argument('--server', type=str, default='thread', choices=['thread', 'aio'],
+                    help='server mode of the switch under test')
+parser.add_argument('--shards', type=int, default=0, metavar='N',
+                    help='worker processes of a sharded switch, 0 for one process')
+parser.add_argument('--agents', type=int, default=8, metavar='A',
+                    help='agent processes, each with its own channel')
+parser.add_argument('--concurrency', type=int, default=4, metavar='C',
+                    help='in-flight fetches per agent')
+parser.add_argument('--duration', type=float, default=5, metavar='S',
+                    help='seconds of load per combination')
+parser.add_argument('--split_fetches', type=int, default=2000, metavar='N',
+                    help='fetches timed in process for the cpu split')
+parser.add_argument('--port', type=str, default="50199", metavar='P',
+                    help='local port of the switch under test')
+parser.add_argument('--json', type=str, default='',
+                    help='write the results to this file')
+
+
+# host pairs {a, b}, a != b, each once, spread over the hosts: every host with its next neighbour, then the one after, ...
+def host_pairs(num_host):
+    for step in range(1, num_host // 2 + 1):
+        for a in range(num_host if 2 * step < num_host else num_host // 2):
+            yield a, (a + step) % num_host
+
+
+# hosts on a star, one link each, flows in pairs a->b, b->a waiting on each other like the testbed rings
+# distinct transmissions only, an odd count is rounded up to the next pair
+def bench_job(num_flows):
+    num_host = max(num_flows // 4, 2)
+    while num_host * (num_host - 1) < num_flows:
+        num_host += 1
+    hosts = ["10.200.%d.%d" % (h // 250, h % 250 + 1) for h in range(num_host)]
+    job = switch_pb2.job(name="bench", model="vgg19")
+    for _, (a, b) in zip(range((num_flows + 1) // 2), host_pairs(num_host)):
+        for srcip, dstip, sid, did in ((hosts[a], hosts[b], a, b), (hosts[b], hosts[a], b, a)):
+            job.flows.add(srcip=srcip, dstip=dstip, volume=549, links=[100 + sid, 100 + did],
+                          subseq_srcip=dstip, subseq_dstip=srcip)
+    return job
+
+
+def transmissions(job):
+    return sorted({(flow.srcip, flow.dstip) for flow in job.flows})
+
+
+def load_switch(time_slot, num_slot):
+    sys.path.insert(0, SWITCH_DIR)
+    import scheduler
+    scheduler.configure(scheduler.parse(["--time_slot", str(time_slot), "--num_slot", str(num_slot)]))
+    return scheduler
+
+
+# thread cpu (us) per fetch in each phase, the fetch itself runs unmodified with timers around its parts
+def cpu_split(scheduler, job, fetches):
+    channel = scheduler.Channel(scheduler.LoadTable(stripes=0, preload=False))
+    channel.add_job(job)
+    spent = collections.defaultdict(float)
+
+    def timed(phase, fn):
+        def wrapper(*args):
+            start = time.thread_time()
+            try:
+                return fn(*args)
+            finally:
+                spent[phase] += time.thread_time() - start
+        return wrapper
+
+    channel.load_table.generate_costs = timed("generate_costs", channel.load_table.generate_costs)
+    channel.protocol.allocate = timed("allocation", channel.protocol.allocate)
+    trans = transmissions(job)
+    for i in range(fetches):
+        srcip, dstip = trans[i % len(trans)]
+        data = switch_pb2.request(srcip=srcip, dstip=dstip, status=(i // len(trans)) % 2, e=20 * 125000000).SerializeToString()
+        start = time.thread_time()
+        request = switch_pb2.request.FromString(data)
+        parsed = time.thread_time()
+        reply = channel.schedule(request)
+        scheduled = time.thread_time()
+        reply.SerializeToString()
+        done = time.thread_time()
+        spent["serialization"] += (parsed - start) + (done - scheduled)
+        spent["total"] += done - start
+    spent["other"] = spent["total"] - spent["serialization"] - spent["generate_costs"] - spent["allocation"]
+    return {phase: spent[phase] / fetches * 1e6 for phase in ("generate_costs", "allocation", "serialization", "other", "total")}
+
+
+def commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=SWITCH_DIR, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args, num_flows, time_slot, num_slot):
+    job = bench_job(num_flows)
+    trans = transmissions(job)
+    proc = start_switch(args.server, args.port, ["--shards", str(args.shards), "--time_slot", str(time_slot), "--num_slot", str(num_slot)])
+    try:
+        Proxy("127.0.0.1", args.port).register_job(job)
+        latencies = run_load("127.0.0.1:" + args.port, args.agents, args.concurrency, args.duration, trans)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {
+        "flows": len(trans), "time_slot": time_slot, "num_slot": num_slot,
+        "throughput": len(latencies) / args.duration,
+        "latency_ms": {"p50": percentile(latencies, 0.5), "p99": percentile(latencies, 0.99), "p999": percentile(latencies, 0.999),
+                       "mean": sum(latencies) / len(latencies)},
+        "cpu_us": cpu_split(load_switch(time_slot, num_slot), job, args.split_fetches),
+    }
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    results = []
+    for num_flows in args.flows:
+        for time_slot in args.time_slot:
+            for num_slot in args.num_slot:
+                result = run(args, num_flows, time_slot, num_slot)
+                results.append(result)
+                latency, cpu = result["latency_ms"], result["cpu_us"]
+                print("flows %4d, T %3d ms, K %3d: %6.0f fetch/s, p50 %.3f ms, p99 %.3f ms, p999 %.3f ms | "
+                      "cpu us: costs %.1f, allocation %.1f, serialization %.1f, other %.1f, total %.1f" % (
+                          result["flows"], time_slot, num_slot, result["throughput"], latency["p50"], latency["p99"], latency["p999"],
+                          cpu["generate_costs"], cpu["allocation"], cpu["serialization"], cpu["other"], cpu["total"]))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"commit": commit(), "time": time.time(), "server": args.server, "shards": args.shards,
+                       "agents": args.agents, "concurrency": args.concurrency, "duration": args.duration,
+                       "results": results}, f, indent=2)
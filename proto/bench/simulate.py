@@ -0,0 +1,273 @@
+"""
+    Discrete-event simulator of training jobs under the switch scheduler, offline and faster
+    than real time. Channel, LoadTable and Proto of scheduler.py run unmodified, on a simulated
+    clock swapped in for scheduler.clock.
+
+    A job is a ring of flows, each waiting on its subsequent flow (flow_subseq_table). In every
+    iteration each flow sends its tensor volume (flow_tensor_table, MB), then the job computes for
+    --compute_ms before the next one. At every slot boundary each flow with bytes left reports to
+    the switch like an agent does (status 0 on the first report of an iteration, 1 after) and
+    sends at the returned rate for the slot. Links have equal capacity, a link asked for more is
+    shared in proportion to the rates, and a flow gets no more than one ring chunk ahead of the
+    flow it waits on.
+
+    Without --jobs the jobs of the static tables run; with --topology and --jobs, ring jobs on
+    random hosts of the fabric arrive over time through the job registry, and leave when done.
+    Reports job completion time, link utilization and scheduler cpu per decision.
+"""
+import os
+import sys
+import json
+import time
+import heapq
+import random
+import argparse
+import collections
+import numpy as np
+
+parser = argparse.ArgumentParser(description='Simulate training jobs scheduled by the switch')
+parser.add_argument('--time_slot', type=int, default=80, metavar='T',
+                    help='time interval of a slot (ms)')
+parser.add_argument('--num_slot', type=int, default=10, metavar='K',
+                    help='K, the number of future time slots to schedule')
+parser.add_argument('--allocator', type=str, default='greedy', choices=['greedy', 'waterfill'],
+                    help='slot allocator of the switch')
+parser.add_argument('--topology', type=str, default='',
+                    help='fattree:K, leafspine:L,S,H or an edge list file, as for switch.py')
+parser.add_argument('--jobs', type=int, default=0, metavar='J',
+                    help='random ring jobs arriving on the topology, 0 to run the jobs of the static tables')
+parser.add_argument('--ring', type=int, default=4, metavar='R',
+                    help='hosts per random job')
+parser.add_argument('--arrival_ms', type=float, default=200, metavar='A',
+                    help='mean time between arrivals of random jobs (ms), exponential')
+parser.add_argument('--iterations', type=int, default=20, metavar='I',
+                    help='iterations per job')
+parser.add_argument('--compute_ms', type=float, default=100, metavar='C',
+                    help='computation between the communication of two iterations (ms)')
+parser.add_argument('--link_gbps', type=float, default=50, metavar='L',
+                    help='capacity of every link (Gbit/s), also the bound e of every report')
+parser.add_argument('--seed', type=int, default=0)
+parser.add_argument('--json', type=str, default='',
+                    help='also write the results to this file')
+
+# rings of random hosts drawn for a job before its hosts are taken as having no free pairs left
+PLACEMENT_TRIES = 10000
+
+
+def load_switch(args):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    import scheduler
+    scheduler.configure(scheduler.parse(["--time_slot", str(args.time_slot), "--num_slot", str(args.num_slot),
+                                         "--allocator", args.allocator, "--topology", args.topology]))
+    return scheduler
+
+
+class Flow():
+    def __init__(self, job, srcip, dstip, volume):
+        self.job = job
+        self.trans = (srcip, dstip)
+        self.volume = volume # bytes per iteration
+        self.sent = 0 # bytes sent in this iteration
+        self.rate = 0 # applied, bytes/s
+        self.first = True # next report starts the iteration
+        self.done_at = None # ms, when the iteration volume was sent
+
+
+class Job():
+    def __init__(self, name, trans, arrival, registered=None):
+        self.name = name
+        self.trans = trans # [(srcip, dstip)] in ring order
+        self.arrival = arrival
+        self.registered = registered # job message when it goes through the registry
+        self.flows = []
+        self.iteration = 0
+        self.finish = None
+
+
+class Simulator():
+    def __init__(self, scheduler, args):
+        from clock import SlotClock
+
+        class SimClock(SlotClock):
+            def now(self):
+                return int(self.t)
+
+        self.scheduler = scheduler
+        self.args = args
+        self.clock = SimClock(args.time_slot)
+        self.clock.t = 0
+        scheduler.clock = self.clock
+        self.channel = scheduler.Channel(scheduler.LoadTable(stripes=0, preload=False))
+        self.capacity = args.link_gbps * 125000000 # bytes/s
+        self.events = [] # (time ms, seq, callback, job)
+        self.seq = 0
+        self.sending = [] # flows with bytes left in their iteration
+        self.link_bytes = collections.defaultdict(float)
+        self.decisions = [] # scheduler cpu per decision, sec
+        self.jobs = []
+
+    def at(self, t, callback, job):
+        heapq.heappush(self.events, (t, self.seq, callback, job))
+        self.seq += 1
+
+    def arrive(self, job):
+        if job.registered is not None:
+            self.channel.add_job(job.registered)
+        job.flows = [Flow(job, s, d, self.scheduler.flow_tensor_table[s][d][1] * 1e6) for s, d in job.trans]
+        self.start_iteration(job)
+
+    def start_iteration(self, job):
+        for flow in job.flows:
+            flow.sent, flow.rate, flow.first, flow.done_at = 0, 0, True, None
+        self.sending.extend(job.flows)
+
+    # communication of an iteration is over
+    def finish_iteration(self, job, t):
+        job.iteration += 1
+        if job.iteration < self.args.iterations:
+            self.at(t + self.args.compute_ms, lambda job, t: self.start_iteration(job), job)
+            return
+        job.finish = t
+        if job.registered is not None:
+            self.channel.remove_job(job.name)
+
+    # every sending flow reports at the slot boundary and applies the returned rate
+    def report(self):
+        switch_pb2 = self.scheduler.switch_pb2
+        for flow in self.sending:
+            request = switch_pb2.request(srcip=flow.trans[0], dstip=flow.trans[1], status=0 if flow.first else 1, e=int(self.capacity))
+            start = time.process_time()
+            flow.rate = self.channel.schedule(request).new_rate
+            self.decisions.append(time.process_time() - start)
+            flow.first = False
+
+    # links of a flow keyed by direction, links are full duplex: a host link is the uplink when first
+    # on the path and the downlink when last, fabric links of a topology are directed already
+    def directed_links(self, flow):
+        links = self.scheduler.link_id_tabel[flow.trans[0]][flow.trans[1]]
+        return [(link, 0 if i == 0 else 1 if i == len(links) - 1 else 2) for i, link in enumerate(links)]
+
+    # send for one slot from t, links shared in proportion to the rates asked
+    def transfer(self, t, slot_ms):
+        load = collections.defaultdict(float)
+        for flow in self.sending:
+            for link in self.directed_links(flow):
+                load[link] += flow.rate
+        # rates after sharing, and what each flow would have sent by the end of the slot at that rate
+        rates = {}
+        for flow in self.sending:
+            links = self.directed_links(flow)
+            rates[flow] = flow.rate * min([1.0] + [self.capacity / load[link] for link in links if load[link] > self.capacity])
+        reach = {flow.trans: min(flow.sent + rates[flow] * slot_ms / 1000, flow.volume) for flow in self.sending}
+        for flow in self.sending:
+            links = self.directed_links(flow)
+            rate = rates[flow]
+            # a ring flow forwards what it received, at most one chunk ahead of the flow it waits on
+            limit = flow.volume
+            subseq = self.scheduler.flow_subseq_table[flow.trans[0]].get(flow.trans[1])
+            if subseq in reach: # not when it has sent its iteration already
+                limit = min(limit, reach[subseq] + flow.volume / len(flow.job.flows))
+            sent = max(min(rate * slot_ms / 1000, limit - flow.sent), 0)
+            if rate > 0 and flow.sent + sent >= flow.volume:
+                flow.done_at = t + (flow.volume - flow.sent) / rate * 1000
+            flow.sent += sent
+            for link in links:
+                self.link_bytes[link] += sent
+
+        done = [flow for flow in self.sending if flow.done_at is not None]
+        self.sending = [flow for flow in self.sending if flow.done_at is None]
+        for job in {flow.job for flow in done}:
+            if all(flow.done_at is not None for flow in job.flows):
+                self.finish_iteration(job, max(flow.done_at for flow in job.flows))
+
+    def run(self, jobs):
+        self.jobs = jobs
+        for job in jobs:
+            self.at(job.arrival, lambda job, t: self.arrive(job), job)
+        slot = self.args.time_slot
+        t = 0
+        while self.events or self.sending:
+            if not self.sending and self.events[0][0] > t:
+                t = -(-self.events[0][0] // slot) * slot # idle, skip to the slot of the next event
+            while self.events and self.events[0][0] <= t:
+                _, _, callback, job = heapq.heappop(self.events)
+                callback(job, t)
+            self.clock.t = t
+            self.report()
+            self.transfer(t, slot)
+            t += slot
+        return t
+
+
+# rings of the static tables, following flow_subseq_table
+def static_jobs(scheduler):
+    jobs, seen = [], set()
+    for srcip in scheduler.flow_tensor_table:
+        for dstip in scheduler.flow_tensor_table[srcip]:
+            trans = (srcip, dstip)
+            ring = []
+            while trans is not None and trans not in seen and trans[1] in scheduler.flow_tensor_table[trans[0]]:
+                seen.add(trans)
+                ring.append(trans)
+                trans = scheduler.flow_subseq_table[trans[0]].get(trans[1])
+            if ring:
+                jobs.append(Job("static-%d" % len(jobs), ring, 0))
+    return jobs
+
+
+# ring jobs on random hosts of the topology, models drawn from the static tables
+def random_jobs(scheduler, args):
+    rng = random.Random(args.seed)
+    hosts = sorted(scheduler.paths.index)
+    models = sorted({model for dsts in scheduler.flow_tensor_table.values() for model in dsts.values()})
+    jobs, t, used = [], 0.0, set()
+    for i in range(args.jobs):
+        t += rng.expovariate(1 / args.arrival_ms)
+        # an ip pair is one transmission, so no two jobs share one, pairs stay taken once the job leaves
+        for _ in range(PLACEMENT_TRIES):
+            ring = rng.sample(hosts, args.ring)
+            trans = [(ring[j], ring[(j + 1) % len(ring)]) for j in range(len(ring))]
+            if used.isdisjoint(trans):
+                break
+        else:
+            parser.error("no free host pairs for job %d of --jobs %d with --ring %d on %d hosts, use fewer jobs or a larger topology"
+                         % (i, args.jobs, args.ring, len(hosts)))
+        used.update(trans)
+        model, size = rng.choice(models)
+        message = scheduler.switch_pb2.job(name="job-%d" % i, model=model)
+        for j, (srcip, dstip) in enumerate(trans):
+            subseq = trans[(j + 1) % len(trans)]
+            message.flows.add(srcip=srcip, dstip=dstip, volume=size, subseq_srcip=subseq[0], subseq_dstip=subseq[1])
+        jobs.append(Job(message.name, trans, t, message))
+    return jobs
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    if args.jobs > 0 and not args.topology:
+        parser.error("--jobs places random jobs on a --topology")
+    scheduler = load_switch(args)
+    jobs = random_jobs(scheduler, args) if args.jobs > 0 else static_jobs(scheduler)
+
+    sim = Simulator(scheduler, args)
+    start = time.time()
+    end = sim.run(jobs)
+    wall = time.time() - start
+
+    jct = np.array([job.finish - job.arrival for job in jobs])
+    utilization = np.array(list(sim.link_bytes.values())) / (sim.capacity * end / 1000)
+    cpu = np.array(sim.decisions) * 1e6
+    results = {
+        "jobs": len(jobs), "simulated_s": end / 1000, "wall_s": wall, "speedup": end / 1000 / wall,
+        "jct_ms": {"mean": jct.mean(), "p50": np.percentile(jct, 50), "p99": np.percentile(jct, 99)},
+        "link_utilization": {"mean": utilization.mean(), "max": utilization.max(), "links": len(utilization)},
+        "decision_cpu_us": {"count": len(cpu), "mean": cpu.mean(), "p50": np.percentile(cpu, 50), "p99": np.percentile(cpu, 99)},
+    }
+    print("%d jobs, %.1f s simulated in %.1f s (%.1fx real time)" % (len(jobs), end / 1000, wall, results["speedup"]))
+    print("JCT: mean %.0f ms, p50 %.0f ms, p99 %.0f ms" % (jct.mean(), np.percentile(jct, 50), np.percentile(jct, 99)))
+    print("link utilization: mean %.1f%%, max %.1f%% over %d link directions" % (utilization.mean() * 100, utilization.max() * 100, len(utilization)))
+    print("scheduler cpu per decision: mean %.1f us, p50 %.1f us, p99 %.1f us over %d decisions" % (
+        cpu.mean(), np.percentile(cpu, 50), np.percentile(cpu, 99), len(cpu)))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,109 @@
+"""
+    Stress check of the load table under concurrent fetches. Every transmission is initialized
+    once, then many threads reschedule them, several threads per transmission, while sharing
+    links with each other. Afterwards:
+        - accumulated rate of a transmission == init rate + sum of every rate returned to it
+          (a lost read-modify-write breaks it)
+        - no slot of any schedule is negative or above the largest bound e requested
+        - no two threads ever allocate into the same schedule at once, while allocations
+          on disjoint paths do overlap
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+import collections
+
+parser = argparse.ArgumentParser(description='Hammer the switch load table from many threads')
+parser.add_argument('--threads', type=int, default=32, metavar='N',
+                    help='fetching threads')
+parser.add_argument('--fetches', type=int, default=500, metavar='F',
+                    help='fetches per thread')
+parser.add_argument('--lock_stripes', type=int, default=64, metavar='S',
+                    help='link locks of the table under test, 0 to see it fail without locking')
+
+
+def load_switch(lock_stripes):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    import scheduler
+    scheduler.configure(scheduler.parse(["--lock_stripes", str(lock_stripes)]))
+    return scheduler
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    scheduler = load_switch(args.lock_stripes)
+    sys.setswitchinterval(1e-6) # switch threads as often as possible
+
+    channel = scheduler.Channel()
+    trans = [(srcip, dstip) for srcip in scheduler.flow_tensor_table for dstip in scheduler.flow_tensor_table[srcip]]
+    bounds = [20 * 125000000, 10 * 125000000, 1 * 125000000]
+    returned = collections.defaultdict(float)
+    for srcip, dstip in trans:
+        reply = channel.fetch(scheduler.switch_pb2.request(srcip=srcip, dstip=dstip, status=0, e=bounds[0]), None)
+        returned[(srcip, dstip)] += reply.new_rate
+
+    errors = []
+
+    def hammer(seed, totals):
+        rng = random.Random(seed)
+        for _ in range(args.fetches):
+            srcip, dstip = rng.choice(trans)
+            request = scheduler.switch_pb2.request(srcip=srcip, dstip=dstip, status=1, e=rng.choice(bounds))
+            try:
+                totals[(srcip, dstip)] += channel.fetch(request, None).new_rate
+            except Exception as e:
+                errors.append(repr(e))
+
+    # watch the allocator: same schedule must never be entered twice, disjoint ones may
+    busy = {} # schedule row -> thread inside
+    overlaps = []
+    concurrency = [0, 0] # now, max
+    allocate = channel.protocol.allocate
+
+    def guarded(buckets, bound, volume, schedule, offset):
+        me = threading.get_ident()
+        if busy.setdefault(schedule.row, me) != me:
+            overlaps.append(schedule.row)
+        concurrency[0] += 1
+        concurrency[1] = max(concurrency)
+        time.sleep(0) # let others in while inside
+        try:
+            return allocate(buckets, bound, volume, schedule, offset)
+        finally:
+            concurrency[0] -= 1
+            if busy.get(schedule.row) == me:
+                del busy[schedule.row]
+    channel.protocol.allocate = guarded
+
+    per_thread = [collections.defaultdict(float) for _ in range(args.threads)]
+    threads = [threading.Thread(target=hammer, args=(i, per_thread[i])) for i in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for totals in per_thread:
+        for t, rate in totals.items():
+            returned[t] += rate
+
+    violations = len(errors) + len(overlaps)
+    if overlaps:
+        print("%d allocations entered a schedule already being allocated" % len(overlaps))
+    for error in sorted(set(errors)):
+        print("fetch failed: %s" % error)
+    for srcip, dstip in trans:
+        accumulated = channel.load_table.trans_accumulate[srcip][dstip]
+        # replies are truncated to int, so allow 1 byte/s per fetch
+        if abs(accumulated - returned[(srcip, dstip)] * scheduler.DECAY_FACTOR) > args.threads * args.fetches:
+            violations += 1
+            print("lost update on %s->%s: accumulated %.0f, returned %.0f" % (srcip, dstip, accumulated, returned[(srcip, dstip)]))
+        rates = channel.load_table.trans_schedule[srcip][dstip].rates
+        if (rates < 0).any() or (rates > max(bounds)).any():
+            violations += 1
+            print("schedule out of bound on %s->%s: %s" % (srcip, dstip, rates))
+
+    print("%d threads x %d fetches, %d lock stripes: %d violations, up to %d allocations in parallel" % (
+        args.threads, args.fetches, args.lock_stripes, violations, concurrency[1]))
+    sys.exit(1 if violations else 0)
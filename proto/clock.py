@@ -0,0 +1,47 @@
+"""
+    Slot clock shared by the switch and the ccp agents.
+
+    Time is integer ms since an epoch chosen by the switch when it starts, read from the
+    monotonic clock so it never wraps or jumps with the wall clock. Agents run on a local clock
+    until they receive the epoch and the switch time, then keep it aligned to the switch slots.
+"""
+import time
+
+
+class SlotClock():
+    # time_slot: ms, epoch_ms: wall clock ms of time zero, defaults to now
+    def __init__(self, time_slot, epoch_ms=None):
+        self.time_slot = time_slot
+        wall_ms = time.time_ns() // 1000000
+        self.epoch_ms = wall_ms if epoch_ms is None else epoch_ms
+        # monotonic anchor, now() = anchor_ms + monotonic time elapsed since
+        self.anchor_ns = time.monotonic_ns()
+        self.anchor_ms = wall_ms - self.epoch_ms
+        # aligned to the switch slots
+        self.synced = False
+
+    # aligned to the switch: now_ms read from it half a round trip ago
+    @classmethod
+    def from_switch(cls, reply, rtt_ms):
+        clock = cls(reply.time_slot, reply.epoch_ms)
+        clock.align(reply, rtt_ms)
+        return clock
+
+    # align a running clock to the switch, now() is read from other threads meanwhile:
+    # the anchor moves in a single assignment
+    def align(self, reply, rtt_ms):
+        self.time_slot, self.epoch_ms = reply.time_slot, reply.epoch_ms
+        self.anchor_ms = reply.now_ms + rtt_ms // 2 - (time.monotonic_ns() - self.anchor_ns) // 1000000
+        self.synced = True
+
+    # ms since epoch
+    def now(self):
+        return self.anchor_ms + (time.monotonic_ns() - self.anchor_ns) // 1000000
+
+    # index of the slot holding t (ms), now by default
+    def slot(self, t=None):
+        return (self.now() if t is None else t) // self.time_slot
+
+    # ms left before the next slot boundary
+    def until_next_slot(self):
+        return self.time_slot - self.now() % self.time_slot
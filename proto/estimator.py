@@ -0,0 +1,94 @@
+"""
+    Bandwidth estimators of the agents, from the rate of every report. Each takes O(1)
+    amortized time per report and fixed memory, however long the flow lives:
+        max     max of the last --replay_slot reports, monotonic deque
+        ewma    exponentially weighted moving average, weight --ewma_alpha of a new report
+        bbr     windowed max of --replay_slot reports keeping three samples, as the
+                max filter of BBR (lib/win_minmax.c in Linux)
+    Shared by runccp.py and deepcc/main.py.
+"""
+import collections
+
+MODES = ['off', 'max', 'ewma', 'bbr']
+
+
+def add_arguments(parser):
+    parser.add_argument('--estimate_e', type=str, nargs='?', const='max', default='off', choices=MODES,
+                        help='estimate the bottleneck bandwidth from the reports instead of using line rate, max when given alone')
+    parser.add_argument('--replay_slot', type=int, default=5, metavar='R',
+                        help='reports in the window of the max and bbr estimators')
+    parser.add_argument('--ewma_alpha', type=float, default=0.25, metavar='A',
+                        help='weight of a new report in the ewma estimator')
+
+
+# new estimator for a flow, None with --estimate_e off
+def from_args(args):
+    if args.estimate_e == 'max':
+        return SlidingMax(args.replay_slot)
+    if args.estimate_e == 'ewma':
+        return Ewma(args.ewma_alpha)
+    if args.estimate_e == 'bbr':
+        return WindowedMax(args.replay_slot)
+    return None
+
+
+class SlidingMax():
+    def __init__(self, window):
+        self.window = window
+        self.count = 0
+        self.samples = collections.deque() # (report, rate), rates decreasing
+
+    # estimate after one more report
+    def update(self, rate):
+        self.count += 1
+        while self.samples and self.samples[-1][1] <= rate:
+            self.samples.pop()
+        self.samples.append((self.count, rate))
+        if self.samples[0][0] <= self.count - self.window:
+            self.samples.popleft()
+        return self.samples[0][1]
+
+
+class Ewma():
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.estimate = None
+
+    def update(self, rate):
+        self.estimate = rate if self.estimate is None else self.alpha * rate + (1 - self.alpha) * self.estimate
+        return self.estimate
+
+
+class WindowedMax():
+    """
+        Best, second and third best rates of the window, at later reports each. When the best
+        one leaves the window the next takes its place, so the estimate is a rate of about the
+        last window reports, near their max, for three rates of memory whatever the window.
+    """
+    def __init__(self, window):
+        self.window = window
+        self.count = 0
+        self.samples = [(0, None)] * 3 # (report, rate)
+
+    def update(self, rate):
+        self.count += 1
+        t, s = self.count, self.samples
+        if s[0][1] is None or rate >= s[0][1] or t - s[2][0] > self.window:
+            self.samples = [(t, rate)] * 3
+            return rate
+        if rate >= s[1][1]:
+            s[1] = s[2] = (t, rate)
+        elif rate >= s[2][1]:
+            s[2] = (t, rate)
+
+        # age the best samples out of the window
+        dt = t - s[0][0]
+        if dt > self.window:
+            s[0], s[1], s[2] = s[1], s[2], (t, rate)
+            if t - s[0][0] > self.window:
+                s[0], s[1], s[2] = s[1], s[2], (t, rate)
+        elif s[1][0] == s[0][0] and dt > self.window / 4:
+            s[1] = s[2] = (t, rate)
+        elif s[2][0] == s[1][0] and dt > self.window / 2:
+            s[2] = (t, rate)
+        return s[0][1]
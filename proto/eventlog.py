@@ -0,0 +1,98 @@
+"""
+    Structured event log of the ccp agents, one NDJSON record per line.
+
+    Every record has the same fields (FIELDS), null when an event has no value for one:
+        {"ts": 1666100000.123, "level": "info", "event": "reschedule", "sid": 3,
+         "src": "10.0.0.1", "dst": "10.0.0.2", "rate": 1250000000, "e": null, "ms": null, "n": null}
+    A report handler only appends a tuple to a ring buffer; a background thread formats and
+    writes the records. When the ring is full the oldest records are dropped and counted, so
+    the handler never waits on the output. Records below --log_level are discarded, and with
+    --log_sample N one of every N debug and info records of each event is kept.
+"""
+import sys
+import json
+import time
+import atexit
+import functools
+import threading
+import collections
+
+DEBUG, INFO, WARN = 10, 20, 30
+LEVELS = {"debug": DEBUG, "info": INFO, "warn": WARN}
+NAMES = {value: name for name, value in LEVELS.items()}
+FIELDS = ("ts", "level", "event", "sid", "src", "dst", "rate", "e", "ms", "n")
+
+
+def add_arguments(parser):
+    parser.add_argument('--log_file', type=str, default='-',
+                        help='file the event records are appended to, - for stdout')
+    parser.add_argument('--log_level', type=str, default='info', choices=list(LEVELS),
+                        help='least level of the records written')
+    parser.add_argument('--log_sample', type=int, default=1, metavar='N',
+                        help='keep one of every N debug and info records of each event')
+
+
+class EventLog():
+    # path: NDJSON output, - for stdout; capacity: records buffered before the oldest are dropped
+    def __init__(self, path='-', level='info', sample=1, capacity=65536, flush_ms=200):
+        self.level = LEVELS[level]
+        self.sample = max(sample, 1)
+        self.seen = collections.Counter() # event -> records offered, for sampling
+        self.ring = collections.deque(maxlen=capacity)
+        self.dropped = 0
+        self.out = sys.stdout if path == '-' else open(path, 'a')
+        self.flush_s = flush_ms / 1000
+        self.closed = threading.Event()
+        self.thread = threading.Thread(target=self.drain_forever, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(args.log_file, args.log_level, args.log_sample)
+
+    def record(self, level, event, sid=None, src=None, dst=None, rate=None, e=None, ms=None, n=None):
+        if level < self.level:
+            return
+        if self.sample > 1 and level < WARN:
+            seen = self.seen[event]
+            self.seen[event] = seen + 1
+            if seen % self.sample:
+                return
+        if len(self.ring) == self.ring.maxlen:
+            self.dropped += 1
+        self.ring.append((time.time(), level, event, sid, src, dst, rate, e, ms, n))
+
+    debug = functools.partialmethod(record, DEBUG)
+    info = functools.partialmethod(record, INFO)
+    warn = functools.partialmethod(record, WARN)
+
+    # write out every buffered record
+    def drain(self):
+        lines = []
+        while True:
+            try:
+                rec = self.ring.popleft()
+            except IndexError:
+                break
+            lines.append(json.dumps(dict(zip(FIELDS, (rec[0], NAMES[rec[1]]) + rec[2:]))))
+        dropped, self.dropped = self.dropped, 0
+        if dropped:
+            lines.append(json.dumps(dict(zip(FIELDS, (time.time(), "warn", "dropped") + (None,) * 6 + (dropped,)))))
+        if lines:
+            self.out.write("\n".join(lines) + "\n")
+            self.out.flush()
+
+    def drain_forever(self):
+        while not self.closed.wait(self.flush_s):
+            self.drain()
+
+    # stop the thread and write what is left, at exit
+    def close(self):
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        self.thread.join()
+        self.drain()
+        if self.out is not sys.stdout:
+            self.out.close()
@@ -0,0 +1,141 @@
+"""
+    Metrics of the switch, served in the Prometheus text format on a local http endpoint.
+
+    Counters and histograms are updated on the hot path, one lock and one bisect per update.
+    Gauges are computed from their callback only when the endpoint is scraped.
+"""
+import time
+import bisect
+import threading
+from concurrent import futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# every metric created, exposed grouped by name
+registered = []
+
+# seconds, from a fast fetch to a whole time slot
+LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25)
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join('%s="%s"' % (key, value) for key, value in labels.items()) + "}"
+
+
+class Counter():
+    kind = "counter"
+
+    def __init__(self, name, help, **labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.value = 0
+        self.lock = threading.Lock()
+        registered.append(self)
+
+    def inc(self, n=1):
+        with self.lock:
+            self.value += n
+
+    def samples(self):
+        yield self.name + format_labels(self.labels), self.value
+
+
+class Histogram():
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS, **labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # last one above every bucket
+        self.sum = 0.0
+        self.lock = threading.Lock()
+        registered.append(self)
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def samples(self):
+        with self.lock:
+            counts, total = list(self.counts), self.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            yield self.name + "_bucket" + format_labels(dict(self.labels, le=repr(bound) if bound != float("inf") else "+Inf")), cumulative
+        yield self.name + "_sum" + format_labels(self.labels), total
+        yield self.name + "_count" + format_labels(self.labels), cumulative
+
+
+class Gauge():
+    kind = "gauge"
+
+    # read: returns [(labels, value)] when scraped
+    def __init__(self, name, help, read):
+        self.name = name
+        self.help = help
+        self.read = read
+        registered.append(self)
+
+    def samples(self):
+        for labels, value in self.read():
+            yield self.name + format_labels(labels), value
+
+
+def exposition():
+    lines = []
+    last = None
+    for metric in sorted(registered, key=lambda metric: metric.name):
+        if metric.name != last:
+            lines.append("# HELP %s %s" % (metric.name, metric.help))
+            lines.append("# TYPE %s %s" % (metric.name, metric.kind))
+            last = metric.name
+        for sample, value in metric.samples():
+            lines.append("%s %s" % (sample, repr(float(value))))
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = exposition().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # scraped every few seconds, keep it out of the switch output
+
+
+# serve /metrics on localhost from a daemon thread
+def serve(port):
+    server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class TimedExecutor(futures.ThreadPoolExecutor):
+    """
+        Thread pool of the grpc server, recording how long each rpc waits for a free worker.
+    """
+    def __init__(self, histogram, **kwargs):
+        super().__init__(**kwargs)
+        self.histogram = histogram
+
+    def submit(self, fn, *args, **kwargs):
+        queued = time.perf_counter()
+
+        def run():
+            self.histogram.observe(time.perf_counter() - queued)
+            return fn(*args, **kwargs)
+        return super().submit(run)
@@ -11,6 +11,16 @@
 
 struct modelSize accumlSize;
 bool shmInit;
+// progress record, attached once to the segment created for this process
+struct mlccProgress* progressPtr;
+// an all-reduce enqueued this long after the previous one starts a new iteration
+NCCL_PARAM(MlccIterGapUs, "MLCC_ITER_GAP_US", 20000);
+uint64_t iteration;
+uint64_t lastEnqueueNs;
+// bytes sent before the current iteration, and when it started
+uint64_t totalBytes;
+uint64_t iterationStartBytes;
+uint64_t iterationStartNs;
 
 bool isCrossMachine(ncclComm* comm){
   // we only use one channel for each connection
@@ -22,9 +32,14 @@ bool isCrossMachine(ncclComm* comm){
   else return false;
 }
 
+uint64_t monotonicNs(){
+  struct timespec ts;
+  clock_gettime(CLOCK_MONOTONIC, &ts);
+  return (uint64_t)ts.tv_sec * 1000000000 + ts.tv_nsec;
+}
+
 // Note that M=1024*1024B
-void accumulateTensorSize(ncclDataType_t datatype, size_t count){
-  size_t dataSize = (size_t) ncclTypeSize(datatype) * count; // represented as bytes
+void accumulateTensorSize(size_t dataSize){
   accumlSize.B += dataSize;
   // tune accumlSize to fit
   if(accumlSize.B >= (1024*1024)){
@@ -50,33 +65,38 @@ ncclResult_t ncclAllReduce(const void* sendbuff, void* recvbuff, size_t count,
   // Judge whether this transmission cross machines
   if(isCrossMachine(comm)){
     // accumulate total data size transmitted
-    accumulateTensorSize(datatype, count);
-    // open shared memory, store based on shmKey (consider asyn? seems is efficiency enough)
-    int shmID;
+    size_t dataSize = (size_t) ncclTypeSize(datatype) * count; // represented as bytes
+    accumulateTensorSize(dataSize);
+    // a gap in the all-reduce calls is the computation between two iterations
+    uint64_t now = monotonicNs();
+    if(iteration == 0 || now - lastEnqueueNs > (uint64_t)ncclParamMlccIterGapUs() * 1000){
+      iteration++;
+      iterationStartBytes = totalBytes;
+      iterationStartNs = now;
+    }
+    lastEnqueueNs = now;
+    totalBytes += dataSize;
+    // open shared memory once, store based on shmKey
     if(!shmInit){
-      shmID = shmget(shmKey, sizeof(struct modelSize), IPC_CREAT | 0666);
-      shmctl(shmID, IPC_RMID, 0);
+      int shmID = shmget(shmKey, sizeof(struct mlccProgress), IPC_CREAT | 0666);
+      shmctl(shmID, IPC_RMID, 0); // drop the segment of a previous run, the agent follows the new one
+      shmID = shmget(shmKey, sizeof(struct mlccProgress), IPC_CREAT | 0666); // open shared memory
+      if (shmID < 0) {
+          // for case of error does not return a valid shmid
+          int err = errno;
+          printf("Error getting shared memory id %d %d\n", shmID, err);
+          exit(EXIT_FAILURE);
+      }
+      INFO(NCCL_NET, "[all_reduce.cc] Open shared id: %d, shmkey: %d....", shmID, shmKey);
+      progressPtr = (struct mlccProgress *)shmat(shmID, NULL, 0); // attach memory, kept until exit
+      if (progressPtr == (void *)-1){
+          printf("shmat failed\n");
+          exit(EXIT_FAILURE);
+      }
       shmInit = true;
     }
-    shmID = shmget(shmKey, sizeof(struct modelSize), IPC_CREAT | 0666); // open shared memory
-    if (shmID < 0) {
-        // for case of error does not return a valid shmid
-        int err = errno;
-        printf("Error getting shared memory id %d %d\n", shmID, err);
-        exit(EXIT_FAILURE);
-    }
-    INFO(NCCL_NET, "[all_reduce.cc] Open shared id: %d, shmkey: %d....", shmID, shmKey);
-    struct modelSize* shmPtr;
-    shmPtr = (struct modelSize *)shmat(shmID, NULL, 0); // attach memory
-    shmPtr->G = accumlSize.G;
-    shmPtr->M = accumlSize.M;
-    shmPtr->B = accumlSize.B; // write accumulative size into memory
-    
-    // detech the ptr, wont delete the shared memory
-    if (shmdt(shmPtr) == -1){
-        printf("shmdt failed\n");
-        exit(EXIT_FAILURE);
-    }
+    // write accumulative size and iteration into memory
+    mlccPublishProgress(progressPtr, &accumlSize, iteration, dataSize, now, iterationStartBytes, iterationStartNs);
   }
   // do nothing if its intra node peer
 
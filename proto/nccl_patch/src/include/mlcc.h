@@ -2,6 +2,8 @@
 #include <stdlib.h>
 #include "socket.h"
 #include <sys/shm.h>
+#include <stdint.h>
+#include <time.h>
 
 // ip of current rank and next rank, obtained from bootstrap
 extern char* myRankIP; 
@@ -18,6 +20,37 @@ struct modelSize{
 };
 extern struct modelSize accumlSize;
 
+// progress record shared with the ccp agent (proto/progress.py), guarded by a seqlock:
+// seq is odd while the writer updates the fields, a reader retries when it saw it odd or changed
+struct mlccProgress{
+    uint64_t seq;
+    uint64_t G; // accumulated size sent, as in modelSize
+    uint64_t M;
+    uint64_t B;
+    uint64_t iteration; // training iteration, counted from 1
+    uint64_t collectiveBytes; // bytes of the current all-reduce
+    uint64_t timestampNs; // CLOCK_MONOTONIC when the all-reduce was enqueued
+    uint64_t iterationStartBytes; // bytes sent before the first all-reduce of the iteration
+    uint64_t iterationStartNs; // CLOCK_MONOTONIC when that all-reduce was enqueued
+};
+
+// single writer: the process owning shmKey
+static inline void mlccPublishProgress(struct mlccProgress* p, struct modelSize* size, uint64_t iteration,
+    uint64_t collectiveBytes, uint64_t timestampNs, uint64_t iterationStartBytes, uint64_t iterationStartNs){
+  uint64_t seq = __atomic_load_n(&p->seq, __ATOMIC_RELAXED);
+  __atomic_store_n(&p->seq, seq + 1, __ATOMIC_RELAXED);
+  __atomic_thread_fence(__ATOMIC_RELEASE);
+  __atomic_store_n(&p->G, (uint64_t)size->G, __ATOMIC_RELAXED);
+  __atomic_store_n(&p->M, (uint64_t)size->M, __ATOMIC_RELAXED);
+  __atomic_store_n(&p->B, (uint64_t)size->B, __ATOMIC_RELAXED);
+  __atomic_store_n(&p->iteration, iteration, __ATOMIC_RELAXED);
+  __atomic_store_n(&p->collectiveBytes, collectiveBytes, __ATOMIC_RELAXED);
+  __atomic_store_n(&p->timestampNs, timestampNs, __ATOMIC_RELAXED);
+  __atomic_store_n(&p->iterationStartBytes, iterationStartBytes, __ATOMIC_RELAXED);
+  __atomic_store_n(&p->iterationStartNs, iterationStartNs, __ATOMIC_RELAXED);
+  __atomic_store_n(&p->seq, seq + 2, __ATOMIC_RELEASE);
+}
+
 // we use src_ip[laster region] * dst_ip[laster region] as the shmKey
 extern int shmKey;
 // if not init, delete existing shared memory
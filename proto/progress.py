@@ -0,0 +1,161 @@
+"""
+    Progress of the NCCL collectives of a flow, read from the shared memory the NCCL patch
+    writes: struct mlccProgress of nccl_patch/src/include/mlcc.h, a seqlock and eight u64
+    fields. The writer makes seq odd, stores the fields and makes it even again, so a read
+    is consistent when seq was even and the same before and after it; otherwise it is retried.
+
+    The segment is attached once and read through a memoryview on it, a read makes no
+    syscall. NCCL removes and creates the segment again on the first all-reduce of its
+    process, and an attachment to the removed one keeps the record written last. So when
+    seq stays the same for recheck_ms, the key is looked up again, and the view moves
+    to the segment it names if that is a new one.
+"""
+import time
+import struct
+import collections
+import sysv_ipc
+from estimator import Ewma
+
+# seq, then the fields of Progress
+RECORD_SIZE = struct.calcsize('9Q')
+# reads given up on while the writer holds the record, the previous one is returned then
+RETRIES = 100
+
+# G, M, B: size sent in total, iteration: counted from 1 by nccl, collective_bytes: size of the
+# last all-reduce, timestamp_ns: CLOCK_MONOTONIC (time.monotonic_ns) when it was enqueued,
+# iteration_start_bytes/_ns: size sent before the first all-reduce of the iteration, and when
+Progress = collections.namedtuple("Progress", ["G", "M", "B", "iteration", "collective_bytes", "timestamp_ns",
+                                               "iteration_start_bytes", "iteration_start_ns"])
+
+
+def sent_bytes(progress):
+    return (progress.G << 30) + (progress.M << 20) + progress.B
+
+
+# shmKey of nccl_patch for a transmission between physical ips, the product of their last bytes
+def shm_key(phy_src_ip, phy_dst_ip):
+    return int(phy_src_ip.split('.')[3]) * int(phy_dst_ip.split('.')[3])
+
+
+# remove the progress segments of earlier runs, those no nccl process is attached to, found in
+# /proc/sysvipc/shm by the size of the record and a key of keys, the shmKeys of the transmissions
+# known to the agent; segments of other programs are left alone
+def remove_stale(keys):
+    removed = 0
+    with open("/proc/sysvipc/shm") as f:
+        next(f) # key shmid perms size cpid lpid nattch ...
+        for line in f:
+            fields = line.split()
+            key, shmid, size, attached = int(fields[0]), int(fields[1]), int(fields[3]), int(fields[6])
+            if key not in keys or size != RECORD_SIZE or attached > 0:
+                continue
+            try:
+                sysv_ipc.remove_shared_memory(shmid)
+                removed += 1
+            except (sysv_ipc.ExistentialError, sysv_ipc.PermissionsError):
+                pass
+    return removed
+
+
+class ProgressView():
+    def __init__(self, key, recheck_ms=1000):
+        self.key = key
+        self.recheck_s = recheck_ms / 1000
+        self.memory = None
+        self.view = None # u64 [seq, fields of Progress] over the attached segment
+        self.seq = None
+        self.last = None
+        self.checked = 0 # monotonic sec the record last changed or the key was looked up
+        self.torn = 0 # reads retried
+
+    # Progress written last, None while NCCL has not created the segment
+    def read(self):
+        if self.memory is None:
+            memory = self.open()
+            if memory is None:
+                return None
+            self.attach(memory)
+        now = time.monotonic()
+        seq = self.view[0]
+        if seq != self.seq:
+            self.consistent()
+            self.checked = now
+        elif now - self.checked > self.recheck_s:
+            self.checked = now
+            memory = self.open()
+            if memory is not None and memory.id != self.memory.id:
+                self.attach(memory)
+                self.consistent()
+            elif memory is not None:
+                memory.detach()
+        return self.last
+
+    # seqlock read of the record into seq and last, kept as they were if the writer never lets go
+    def consistent(self):
+        view = self.view
+        for _ in range(RETRIES):
+            seq = view[0]
+            if not seq & 1:
+                fields = view[1:9].tolist()
+                if view[0] == seq:
+                    self.seq, self.last = seq, Progress(*fields)
+                    return
+            self.torn += 1
+
+    # segment the key names now, attached, None if there is none
+    def open(self):
+        try:
+            return sysv_ipc.SharedMemory(self.key, flags=0)
+        except sysv_ipc.ExistentialError:
+            return None
+
+    def attach(self, memory):
+        self.close()
+        self.memory = memory
+        self.view = memoryview(memory)[:RECORD_SIZE].cast('Q')
+        self.seq = None
+
+    # a dropped SharedMemory stays mapped, detach explicitly
+    def close(self):
+        if self.memory is None:
+            return
+        self.view.release()
+        self.memory.detach()
+        self.memory = self.view = None
+
+    def __del__(self):
+        self.close()
+
+
+class IterationLearner():
+    """
+        Volume and period of a training iteration, measured between the starts of the
+        iterations seen in the progress record and smoothed by an ewma, instead of the
+        profiled volume of flow_tensor_table. None until the first iteration is over.
+    """
+    def __init__(self, alpha=0.5):
+        self.volume = Ewma(alpha) # bytes
+        self.period = Ewma(alpha) # ns
+        self.start = None # (iteration, start bytes, start ns) seen last
+
+    # True when an iteration was measured
+    def update(self, progress):
+        if progress.iteration == 0:
+            return False
+        start = (progress.iteration, progress.iteration_start_bytes, progress.iteration_start_ns)
+        learned = False
+        if self.start is not None and start[0] > self.start[0]:
+            # averaged over iterations started in between without a report
+            n = start[0] - self.start[0]
+            self.volume.update((start[1] - self.start[1]) / n)
+            self.period.update((start[2] - self.start[2]) / n)
+            learned = True
+        self.start = start # a new nccl process counts from 1 again
+        return learned
+
+    # MB as in flow_tensor_table, 1e6 bytes as the switch reads the volume of a request
+    def volume_mb(self):
+        return None if self.volume.estimate is None else self.volume.estimate / 1e6
+
+    def period_ms(self):
+        return None if self.period.estimate is None else self.period.estimate / 1e6
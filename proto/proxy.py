@@ -1,31 +1,190 @@
 """
     This is the proxy part used by ccp agent to communicate with switch
 """
+import time
+import queue
+import weakref
+import threading
+import collections
 import grpc
 import switch_pb2
 import switch_pb2_grpc
 
+# keepalive pings keep idle channels warm, broken ones reconnect with exponential backoff
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 10000),
+    ("grpc.keepalive_timeout_ms", 5000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    ("grpc.initial_reconnect_backoff_ms", 100),
+    ("grpc.min_reconnect_backoff_ms", 100),
+    ("grpc.max_reconnect_backoff_ms", 5000),
+]
+
+
+class ChannelPool():
+    """
+        Process-wide pool, one persistent channel and stub per switch address,
+        shared by every flow of the agent instead of a new connection per call.
+    """
+    def __init__(self):
+        self.stubs = {} # target -> (channel, stub)
+        self.lock = threading.Lock()
+
+    def get(self, target):
+        with self.lock:
+            if target not in self.stubs:
+                channel = grpc.insecure_channel(target, options=CHANNEL_OPTIONS)
+                self.stubs[target] = (channel, switch_pb2_grpc.ChannelStub(channel))
+            return self.stubs[target][1]
+
+    def close(self):
+        with self.lock:
+            for channel, _ in self.stubs.values():
+                channel.close()
+            self.stubs.clear()
+
+channel_pool = ChannelPool()
+
+
 class Proxy():
-    def __init__(self, switch_ip, switch_port):
+    # timeout: optional per-call deadline in sec
+    def __init__(self, switch_ip, switch_port, timeout=None):
         self.switch_ip = switch_ip
         self.switch_port = switch_port
+        self.timeout = timeout
+        self.stub = channel_pool.get(switch_ip + ":" + switch_port)
     
     # we can move workload to switch for easy check
-    def fetch_newrate(self, srcip, dstip, status, e):
-        with grpc.insecure_channel(self.switch_ip + ":" + self.switch_port) as channel:
-            stub = switch_pb2_grpc.ChannelStub(channel)
-            response = stub.fetch(switch_pb2.request(srcip=srcip, dstip=dstip, status=status, e=e))    
-        return response
+    # plan: also return the rates of the following slots, see MLCCFlow.step_plan
+    # volume: MB of an iteration measured by the agent, 0 for the volume of the job tables
+    # adjust: bytes/s applied or, negative, never applied outside the replies the switch accounted
+    def fetch_newrate(self, srcip, dstip, status, e, plan=False, volume=0, adjust=0):
+        return self.stub.fetch(switch_pb2.request(srcip=srcip, dstip=dstip, status=status, e=e, plan=plan, volume=volume,
+                                                  adjust=adjust),
+                               timeout=self.timeout)
+
+    # the same fetch without waiting for the reply, a grpc future of it; timeout overrides the deadline of the proxy
+    def fetch_newrate_async(self, srcip, dstip, status, e, plan=False, volume=0, adjust=0, timeout=None):
+        return self.stub.fetch.future(switch_pb2.request(srcip=srcip, dstip=dstip, status=status, e=e, plan=plan, volume=volume,
+                                                         adjust=adjust),
+                                      timeout=timeout if timeout is not None else self.timeout)
+
+    # requests: [{field: value} of a request], one reply per request in the same order
+    def fetch_newrates(self, requests):
+        response = self.stub.fetchBatch(switch_pb2.batchRequest(requests=[switch_pb2.request(**fields) for fields in requests]),
+                                        timeout=self.timeout)
+        return response.replies
+
+    def fetch_clock(self):
+        return self.stub.getClock(switch_pb2.clockRequest(), timeout=self.timeout)
+
+    def register_job(self, job):
+        return self.stub.registerJob(job, timeout=self.timeout)
+
+    def remove_job(self, name):
+        return self.stub.removeJob(switch_pb2.job(name=name), timeout=self.timeout)
+
+    def fetch_jobs(self):
+        return self.stub.listJobs(switch_pb2.jobsRequest(), timeout=self.timeout)
 
     def send_schedule(self, schedule):
-        with grpc.insecure_channel(self.switch_ip + ":" + self.switch_port) as channel:
-            stub = switch_pb2_grpc.ChannelStub(channel)
-            response = stub.sendSchedule(switch_pb2.schedRequest(schedule=schedule))    
-        return response
+        return self.stub.sendSchedule(switch_pb2.schedRequest(schedule=schedule), timeout=self.timeout)
         
     def fetch_obs(self, srcip, dstip):
-        with grpc.insecure_channel(self.switch_ip + ":" + self.switch_port) as channel:
-            stub = switch_pb2_grpc.ChannelStub(channel)
-            response = stub.fetchObs(switch_pb2.obsRequest(srcip=srcip, dstip=dstip))
-        return response
-    
\ No newline at end of file
+        return self.stub.fetchObs(switch_pb2.obsRequest(srcip=srcip, dstip=dstip), timeout=self.timeout)
+
+
+class BatchProxy(Proxy):
+    """
+        Shared by all flows of one agent host, a fetch also reschedules every other live
+        transmission of the host in the same fetchBatch, their replies are served from cache
+        when they report within the same time slot. Those reschedules are dry runs the switch
+        keeps nothing of, so a cached reply left unused costs nothing; one that is used is
+        added to the rates the switch accounts the flow with on its next fetch.
+    """
+    def __init__(self, switch_ip, switch_port, time_slot, timeout=None):
+        super().__init__(switch_ip, switch_port, timeout)
+        self.time_slot = time_slot / 1000 # sec
+        self.flows = {} # (srcip, dstip) -> (e, time of last own fetch, volume)
+        self.replies = {} # (srcip, dstip) -> (time fetched, reply)
+        self.applied = collections.Counter() # (srcip, dstip) -> adjust of its next fetch, cached rates served since the last, bytes/s
+        # flows fetch from their own report callbacks
+        self.lock = threading.Lock()
+
+    def fetch_newrate(self, srcip, dstip, status, e, volume=0, adjust=0):
+        trans = (srcip, dstip)
+        now = time.time()
+        with self.lock:
+            self.flows[trans] = (e, now, volume)
+            cached = self.replies.pop(trans, None)
+            if status == 1 and cached is not None and now - cached[0] < self.time_slot:
+                self.applied[trans] += cached[1].new_rate + adjust
+                return cached[1]
+            adjust += self.applied.pop(trans, 0)
+            # only transmissions that fetched themselves recently are rescheduled ahead of their report
+            others = [(s, d, flow_e, flow_volume) for (s, d), (flow_e, last, flow_volume) in self.flows.items()
+                      if (s, d) != trans and now - last < 2 * self.time_slot]
+
+        try:
+            replies = self.fetch_newrates([dict(srcip=srcip, dstip=dstip, status=status, e=e, volume=volume, adjust=adjust)] +
+                                          [dict(srcip=s, dstip=d, status=1, e=flow_e, volume=flow_volume, dry_run=True)
+                                           for s, d, flow_e, flow_volume in others])
+        except grpc.RpcError:
+            with self.lock:
+                self.applied[trans] += adjust # still to be accounted, the adjustment of the caller with it
+            raise
+        with self.lock:
+            for (s, d, _, _), reply in zip(others, replies[1:]):
+                self.replies[(s, d)] = (now, reply)
+        return replies[0]
+
+
+class ControlStream():
+    """
+        One long-lived bidirectional stream per agent host. Reports are pushed as they arrive,
+        rates come back either as replies or as proactive pushes from the switch, and are handed
+        to the callbacks subscribed for that transmission.
+    """
+    def __init__(self, switch_ip, switch_port):
+        self.switch_ip = switch_ip
+        self.switch_port = switch_port
+        # (srcip, dstip) -> [weak callback(new_rate)], flows going away drop out on their own
+        self.callbacks = collections.defaultdict(list)
+        self.requests = None
+        self.lock = threading.Lock()
+
+    def subscribe(self, srcip, dstip, callback):
+        with self.lock:
+            self.callbacks[(srcip, dstip)].append(weakref.WeakMethod(callback))
+
+    def push(self, srcip, dstip, status, e, volume=0):
+        with self.lock:
+            if self.requests is None:
+                self.connect()
+            requests = self.requests
+        requests.put(switch_pb2.request(srcip=srcip, dstip=dstip, status=status, e=e, volume=volume))
+
+    def connect(self):
+        self.requests = queue.Queue()
+        responses = channel_pool.get(self.switch_ip + ":" + self.switch_port).control(iter(self.requests.get, None))
+        threading.Thread(target=self.receive, args=(responses, self.requests), daemon=True).start()
+
+    def receive(self, responses, requests):
+        try:
+            for reply in responses:
+                with self.lock:
+                    refs = self.callbacks[(reply.srcip, reply.dstip)]
+                    callbacks = [ref() for ref in refs]
+                    refs[:] = [ref for ref, callback in zip(refs, callbacks) if callback is not None]
+                for callback in callbacks:
+                    if callback is not None:
+                        callback(reply.new_rate)
+        except grpc.RpcError as e:
+            print("control stream closed: %s" % e.code())
+        finally:
+            requests.put(None) # end the request iterator
+            # reconnect on next push
+            with self.lock:
+                if self.requests is requests:
+                    self.requests = None
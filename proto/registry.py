@@ -0,0 +1,144 @@
+"""
+    Job registry, jobs add and remove their flows at run time instead of editing utils_p1p1.
+
+    A registered job writes its flows into the same tables the switch and agents read
+    (flow_tensor_table, link_id_tabel, flow_subseq_table, ip_transfer_table), so flows of the
+    static tables and registered ones are served alike. The switch keeps a snapshot of the
+    registered jobs on disk and loads it again when it restarts.
+
+    Register a job at launch, from a json file in the form of the job message:
+        python registry.py register job.json
+    {"name": "vgg19-ring", "model": "vgg19", "ipTransfer": {"302062602": "10.28.1.18", ...},
+     "flows": [{"srcip": "10.28.1.18", "dstip": "10.28.1.19", "volume": 549, "links": [0, 1],
+                "subseqSrcip": "10.28.1.19", "subseqDstip": "10.28.1.18"}, ...]}
+    links can be left out when the switch runs with --topology, the path is computed from it.
+"""
+import os
+import json
+import argparse
+import threading
+import switch_pb2
+from google.protobuf import json_format
+from utils_p1p1 import *
+
+
+class Registry():
+    # path: snapshot file, None to keep jobs in memory only
+    # paths: topology.PathTable routing flows registered without links, and static flows without a path
+    def __init__(self, path=None, paths=None):
+        self.path = path
+        self.paths = paths
+        self.jobs = {} # name -> job
+        # name -> {(srcip, dstip): (tensor, links, subseq)}, entries of the tables a job replaced, None where there were none
+        self.replaced = {}
+        if paths is not None:
+            for srcip in flow_tensor_table.keys():
+                for dstip in flow_tensor_table[srcip].keys():
+                    if dstip not in link_id_tabel[srcip] and srcip in paths and dstip in paths:
+                        link_id_tabel[srcip][dstip] = paths.path(srcip, dstip)
+        # one update of the tables and one snapshot at a time, add and remove hold it across save's
+        self.lock = threading.RLock()
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                for job in switch_pb2.jobList.FromString(f.read()).jobs:
+                    self.add(job)
+
+    # flows in the tables a job changes: its old flows it drops, and flows with a new path or dependency,
+    # the load table unregisters them before add, while their old paths are still in the tables
+    def stale(self, job):
+        old = self.jobs.get(job.name)
+        kept = {(flow.srcip, flow.dstip) for flow in job.flows}
+        stale = [] if old is None else [(flow.srcip, flow.dstip) for flow in old.flows if (flow.srcip, flow.dstip) not in kept]
+        for flow in job.flows:
+            subseq = (flow.subseq_srcip, flow.subseq_dstip) if flow.subseq_srcip else None
+            links = self.links(flow)
+            if link_id_tabel[flow.srcip].get(flow.dstip, links) != links or flow_subseq_table[flow.srcip].get(flow.dstip, subseq) != subseq:
+                stale.append((flow.srcip, flow.dstip))
+        return stale
+
+    # write the flows of a job into the tables, replacing a job of the same name in place: flows of
+    # both are overwritten, never missing from the tables, flows only the old one had are given back
+    def add(self, job):
+        with self.lock:
+            replaced = self.replaced.pop(job.name, {})
+            kept = {}
+            for flow in job.flows:
+                trans = (flow.srcip, flow.dstip)
+                kept[trans] = replaced.pop(trans) if trans in replaced else self.entries(*trans)
+                flow_tensor_table[flow.srcip][flow.dstip] = (job.model, flow.volume)
+                link_id_tabel[flow.srcip][flow.dstip] = self.links(flow)
+                if flow.subseq_srcip:
+                    flow_subseq_table[flow.srcip][flow.dstip] = (flow.subseq_srcip, flow.subseq_dstip)
+                else:
+                    flow_subseq_table[flow.srcip].pop(flow.dstip, None)
+            for trans, entries in replaced.items():
+                self.restore(trans, entries)
+            ip_transfer_table.update(job.ip_transfer)
+            self.jobs[job.name] = job
+            self.replaced[job.name] = kept
+            return len(job.flows)
+
+    # drop the flows of a job from the tables, static flows it replaced are served again
+    def remove(self, name):
+        with self.lock:
+            job = self.jobs.pop(name, None)
+            if job is None:
+                return 0
+            for trans, entries in self.replaced.pop(name).items():
+                self.restore(trans, entries)
+            return len(job.flows)
+
+    # (tensor, links, subseq) of a transmission in the tables, None where it has none
+    def entries(self, srcip, dstip):
+        return tuple(table[srcip].get(dstip) for table in (flow_tensor_table, link_id_tabel, flow_subseq_table))
+
+    def restore(self, trans, entries):
+        srcip, dstip = trans
+        for table, entry in zip((flow_tensor_table, link_id_tabel, flow_subseq_table), entries):
+            if entry is None:
+                table[srcip].pop(dstip, None)
+            else:
+                table[srcip][dstip] = entry
+
+    # links given by the job, or its path in the topology
+    def links(self, flow):
+        if flow.links or self.paths is None:
+            return list(flow.links)
+        return self.paths.path(flow.srcip, flow.dstip)
+
+    def flows(self, name):
+        job = self.jobs.get(name)
+        return [] if job is None else [(flow.srcip, flow.dstip) for flow in job.flows]
+
+    def job_list(self):
+        return switch_pb2.jobList(jobs=list(self.jobs.values()))
+
+    # written aside and renamed, a crash leaves the previous snapshot
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            with open(self.path + ".tmp", "wb") as f:
+                f.write(self.job_list().SerializeToString())
+            os.replace(self.path + ".tmp", self.path)
+
+
+if __name__ == '__main__':
+    from proxy import Proxy
+
+    parser = argparse.ArgumentParser(description='Register jobs on the switch')
+    parser.add_argument('op', choices=['register', 'remove', 'list'])
+    parser.add_argument('job', nargs='?', help='job json file to register, or name of the job to remove')
+    parser.add_argument('--ip', type=str, default=SWITCH_IP)
+    parser.add_argument('--port', type=str, default=SWITCH_PORT)
+    args = parser.parse_args()
+
+    proxy = Proxy(args.ip, args.port)
+    if args.op == 'register':
+        with open(args.job) as f:
+            job = json_format.ParseDict(json.load(f), switch_pb2.job())
+        print("registered %d flows of %s" % (proxy.register_job(job).num_flows, job.name))
+    elif args.op == 'remove':
+        print("removed %d flows of %s" % (proxy.remove_job(args.job).num_flows, args.job))
+    else:
+        print(json_format.MessageToJson(proxy.fetch_jobs()))
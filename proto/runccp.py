@@ -2,10 +2,15 @@ import sys
 import pyportus as portus
 import time
 import argparse
-import sysv_ipc
-import struct
-import os
-from proxy import Proxy
+import threading
+import grpc
+from proxy import Proxy, BatchProxy, ControlStream
+from clock import SlotClock
+from progress import ProgressView, IterationLearner, remove_stale, shm_key
+import estimator
+from registry import Registry
+from eventlog import EventLog, add_arguments as add_log_arguments
+import metrics
 from utils_p1p1 import *
 
 # increase cwnd and line rate, if NIC bandwidth increses
@@ -14,14 +19,51 @@ parser.add_argument('--time_slot', type=int, default=80, metavar='T',
                     help='time interval of a slot (ms)')
 parser.add_argument('--report_bias', type=int, default=4000, metavar='B',
                     help='Mbps, report rate > apply rate 4Gbps')
-parser.add_argument('--estimate_e', action="store_true",
-                    help='whether use bottleneck bandwidth or just use line rate as e to allocate')
-parser.add_argument('--replay_slot', type=int, default=5, metavar='R',
-                    help='estimate T previous slots to obtain estimation of avaialbale bandwidth')
 parser.add_argument('--init_cwnd', type=int, default=9000, metavar='W',
                     help='set a large window size (mss), so that cwnd will not the bottleneck.')
 parser.add_argument('--line_rate', type=int, default=20, metavar='L',
                     help='set the line rate (Gbit/s) based on avaiable bandwidth (1 Mbit/s = 1e6/8 bytes/s)') # 125_000_000
+parser.add_argument('--batch_fetch', action="store_true",
+                    help='fetch rates of all flows on this host in one batched rpc per time slot')
+parser.add_argument('--stream', action="store_true",
+                    help='push reports and receive rates over one control stream to the switch')
+parser.add_argument('--local_plan', action="store_true",
+                    help='step through the K-slot plan of the switch locally, fetch only when it runs out')
+parser.add_argument('--plan_tolerance', type=float, default=0.1, metavar='P',
+                    help='fetch a new plan when estimated bandwidth moves this fraction away from the one planned with')
+parser.add_argument('--rpc_timeout', type=int, default=0, metavar='D',
+                    help='deadline (ms) of each rpc to the switch, 0 for none')
+parser.add_argument('--async_fetch', action="store_true",
+                    help='fetch off the report callback, apply the rate when it arrives, keep the previous one past the deadline')
+parser.add_argument('--rate_tolerance', type=float, default=0, metavar='F',
+                    help='skip a datapath update when the new rate is within this fraction of the installed one')
+parser.add_argument('--metrics_port', type=int, default=0, metavar='M',
+                    help='serve metrics on http://127.0.0.1:M/metrics, 0 to not serve them')
+parser.add_argument('--table_volume', action="store_true",
+                    help='schedule with the profiled volume of the job tables, not the volume measured from nccl')
+parser.add_argument('--shm_recheck', type=int, default=1000, metavar='S',
+                    help='look the nccl shared memory up again when its progress stays the same this long (ms)')
+estimator.add_arguments(parser)
+add_log_arguments(parser)
+
+# rate updates of all flows, sent into the datapath or skipped as within --rate_tolerance
+rate_updates = {result: metrics.Counter("agent_rate_updates_total", "rate updates of the datapath", result=result)
+                for result in ("sent", "suppressed")}
+# from a new flow to its program installed at line rate, and to the init rate of the switch applied
+flow_start_seconds = {stage: metrics.Histogram("agent_flow_start_seconds", "time to control a new flow", stage=stage)
+                      for stage in ("program", "rate")}
+
+# per-call deadline in sec, None to wait for the switch
+def rpc_timeout(args):
+    return args.rpc_timeout / 1000 if args.rpc_timeout > 0 else None
+
+# deadline of a clock or jobs fetch without --rpc_timeout, and first and longest wait between two, sec
+CLOCK_TIMEOUT = 1
+CLOCK_BACKOFF = (0.1, 5)
+
+# deadline of an async fetch in sec, a rate arriving after the slot it was asked for is of no use
+def fetch_deadline(args):
+    return rpc_timeout(args) or args.time_slot / 1000
 
 '''
     For persistent cross flows, we dont check specific socket,
@@ -29,8 +71,11 @@ parser.add_argument('--line_rate', type=int, default=20, metavar='L',
     We apply the same control logic, since init flows will complete soon (no report then).
 '''
 class MLCCFlow():
-    def __init__(self, datapath, datapath_info, args):
+    # log: eventlog.EventLog of the agent
+    def __init__(self, datapath, datapath_info, args, log, proxy=None, stream=None, clock=None):
+        self.created = time.time()
         self.args = args
+        self.log = log
 
         # receive init args from user
         self.dp = datapath
@@ -44,93 +89,268 @@ class MLCCFlow():
         self.src_ip = self.dp_info.src_ip
         self.dst_ip = self.dp_info.dst_ip
 
-        # calculate shmKey used to interact with nccl
-        self.phy_src_ip = ip_transfer_table[self.src_ip]
-        self.phy_dst_ip = ip_transfer_table[self.dst_ip]
-        self.shm_key = int(self.phy_src_ip.split('.')[3]) * int(self.phy_dst_ip.split('.')[3])
+        # physical ips of the transmission, None until a sync of the jobs brings in an unknown one
+        self.phy_src_ip = None
+        self.phy_dst_ip = None
+        # nccl progress, attached on the first report, read without syscalls after
+        self.progress = None
 
         # record current iteration
         self.iter_cur = 1
+        # volume and period of an iteration, measured from the nccl progress
+        self.learner = IterationLearner()
 
-        # proxy used to request the switch
-        self.proxy = Proxy(SWITCH_IP, SWITCH_PORT)
+        # proxy used to request the switch, shared by the host's flows when batching
+        self.proxy = proxy if proxy is not None else Proxy(SWITCH_IP, SWITCH_PORT, rpc_timeout(args))
+        # host control stream, rates pushed by the switch arrive in on_rate
+        self.stream = stream
         self.bottle_e = self.line_rate_byteps
 
+        # with local_plan, rates of the following slots from the last fetch, stepped on the switch clock
+        self.clock = clock
+        self.plan = None
+        self.plan_start = 0
+        self.plan_e = 0
+
+        # report callback, grpc threads of async fetches and the stream thread all update the flow
+        self.lock = threading.RLock()
+        # number of the last fetch issued, and of the one whose reply was applied last: replies of earlier
+        # fetches arriving after it are not applied, those of later ones are even before the last is back
+        self.fetch_seq = 0
+        self.applied_seq = 0
+        # number of the last init fetch issued, the switch accounts the flow again from it
+        self.init_seq = 0
+        # bytes/s of replies the switch accounted but the flow never applied, taken off with the next fetch
+        self.unapplied = 0
+        # the next fetch inits: an init fetch missed its deadline, or was left to the first report
+        self.init_missed = False
+        # no rate of the switch applied yet
+        self.first_rate = True
+
         # record rates in every report received
         self.report_count = 0
-        self.replay_rates = []
+        # bottleneck bandwidth from the reported rates, None to use line rate
+        self.estimator = estimator.from_args(args)
+
+        # the flow is controlled at line rate at once, the init rate of the switch is applied when it arrives
+        self.dp.set_program("default", [("Rate", self.line_rate_byteps), ("Cwnd", self.cwnd), ("time_slot_us", self.time_slot_us)])
+        self.installed_rate = self.line_rate_byteps # rate the datapath sends at
+        flow_start_seconds["program"].observe(time.time() - self.created)
+        if self.resolve():
+            self.start()
+
+    # look the transmission up in the tables, False while they do not know it
+    def resolve(self):
+        phy_src_ip, phy_dst_ip = ip_transfer_table.get(self.src_ip), ip_transfer_table.get(self.dst_ip)
+        if phy_src_ip is None or phy_dst_ip is None:
+            return False
+        self.phy_src_ip, self.phy_dst_ip = phy_src_ip, phy_dst_ip
+        # calculate shmKey used to interact with nccl
+        self.shm_key = shm_key(self.phy_src_ip, self.phy_dst_ip)
+        self.progress = ProgressView(self.shm_key, self.args.shm_recheck)
+        return True
+
+    # schedule the resolved transmission
+    def start(self):
+        if self.stream is not None:
+            self.stream.subscribe(self.phy_src_ip, self.phy_dst_ip, self.on_rate)
 
         # the transmission is uniquelly identified by srcip and dstip
-        # we move scheduling tasks to the switch
-        start = time.time() 
-        new_rate = self.proxy.fetch_newrate(self.phy_src_ip, self.phy_dst_ip, 0, self.bottle_e).new_rate
-        end = time.time()
-        print("new init rate", new_rate)
-        print("proxy commu time %s ms" % ((end - start)*1000))
-        # profile total processing time here, 10ms
-
-        self.dp.set_program("default", [("Rate", new_rate), ("Cwnd", self.cwnd), ("time_slot_us", self.time_slot_us)])
+        # we move scheduling tasks to the switch, the init goes the way every fetch of the flow goes:
+        # on the host stream, batched with the host's flows on the first report, or async on its own
+        if self.stream is not None:
+            self.push_report(True)
+        elif self.args.batch_fetch:
+            self.init_missed = True
+        else:
+            self.refresh_rate(0, "init", wait=False)
+
+    def on_rate(self, new_rate):
+        with self.lock:
+            self.apply_rate(new_rate)
+            self.started()
+        self.log.info("pushed", self.sock_id, self.src_ip, self.dst_ip, rate=new_rate)
     
     def on_report(self, r):
-        print(f"=> Flow [sid:{self.sock_id}, sip:{self.src_ip}, dip:{self.dst_ip}] receives a report")
         '''
             transfer ip, open shm, check interation whether change new flow 
                 - if mem empty: continue
                 - if change: init schedule
                 - if not: reschedule
         '''
-        # self.cpu_interfernce()
+        with self.lock:
+            # self.cpu_interfernce()
 
-        # caputure error and return, dont generate error report
-        try:
-            memory = sysv_ipc.SharedMemory(self.shm_key, flags=0)
-        except sysv_ipc.ExistentialError: 
-            return
-        memory_value = memory.read(byte_count=0,offset=0)
-        data = struct.unpack('LLL', memory_value)
-        # G: data[0] M: data[1] B: data[0]
+            # a flow the tables did not know stays at line rate until the jobs are synced
+            if self.progress is None:
+                if self.resolve():
+                    self.start()
+                return
+
+            # no progress before nccl creates the shared memory, dont generate error report
+            progress = self.progress.read()
+            if progress is None:
+                return
+            if self.learner.update(progress):
+                self.log.info("learned", self.sock_id, self.src_ip, self.dst_ip, ms=self.learner.period_ms(), n=int(self.learner.volume.estimate))
 
-        report_rate_mbps = r.rate/125000
-        tuned_rate_mbps = (report_rate_mbps - self.args.report_bias) if (report_rate_mbps - self.args.report_bias) > 0 else report_rate_mbps
+            report_rate_mbps = r.rate/125000
+            tuned_rate_mbps = (report_rate_mbps - self.args.report_bias) if (report_rate_mbps - self.args.report_bias) > 0 else report_rate_mbps
         
-        # add replay at most T slots to obtain estimated rate
-        self.report_count += 1
-        self.replay_rates.append(tuned_rate_mbps)
+            self.report_count += 1
         
-        if self.args.estimate_e is True:
-            self.bottle_e = min(self.obtain_e_from_T(), self.line_rate_byteps) # bytesps, restrict rate not exceed line
-            print("\tBottleneck bandwidth estimation is: ", self.bottle_e)
-        else:
-            self.bottle_e = self.line_rate_byteps
+            if self.estimator is not None:
+                self.bottle_e = min(int(self.estimator.update(tuned_rate_mbps)*125000), self.line_rate_byteps) # bytesps, restrict rate not exceed line
+            else:
+                self.bottle_e = self.line_rate_byteps
+            self.log.debug("report", self.sock_id, self.src_ip, self.dst_ip, rate=r.rate, e=self.bottle_e)
 
-        if(self.is_next_iteration(data)):
-            new_rate = self.proxy.fetch_newrate(self.phy_src_ip, self.phy_dst_ip, 0, self.bottle_e).new_rate
-            self.dp.update_field("Rate", new_rate) # udpate rate into datapath
-            print("\t========= New iteration flow with init rate: ", new_rate)
-        else:
-            new_rate = self.proxy.fetch_newrate(self.phy_src_ip, self.phy_dst_ip, 1, self.bottle_e).new_rate
-            self.dp.update_field("Rate", new_rate) # udpate rate into datapath
-            print("\tReschedule rate", new_rate)
-            return        
+            if self.stream is not None:
+                self.push_report(self.is_next_iteration(progress))
+            elif(self.is_next_iteration(progress)):
+                self.refresh_rate(0, "iteration")
+            else:
+                new_rate = self.step_plan()
+                if new_rate is not None:
+                    self.apply_rate(new_rate)
+                    self.log.info("planned", self.sock_id, self.src_ip, self.dst_ip, rate=new_rate)
+                    return
+                self.refresh_rate(1, "reschedule")
+                return
+
+    # report on the host stream, the rate is applied in on_rate when the switch answers
+    def push_report(self, init):
+        init = init or self.init_missed
+        volume = self.volume()
+        if volume is None:
+            self.init_missed = init
+            return
+        self.init_missed = False
+        self.stream.push(self.phy_src_ip, self.phy_dst_ip, 0 if init else 1, self.bottle_e, volume)
+
+    # fetch a new rate and apply it, with async_fetch or wait=False the report callback returns before the reply
+    def refresh_rate(self, status, event, wait=True):
+        volume = self.volume()
+        if volume is None:
+            # no volume to schedule until an iteration was measured, the installed rate stays
+            self.init_missed = self.init_missed or status == 0
+            return
+        if self.init_missed:
+            status, event, self.init_missed = 0, "iteration", False
+        if wait and not self.args.async_fetch:
+            self.fetch_seq += 1
+            seq, start = self.fetch_seq, time.time()
+            adjust = self.take_adjust(status, seq)
+            try:
+                new_rate = self.fetch_rate(status, volume, adjust)
+            except grpc.RpcError:
+                # keep the rate of the previous slot, as past the deadline of an async fetch
+                self.unapplied -= adjust
+                self.init_missed = self.init_missed or status == 0
+                self.log.warn("missed", self.sock_id, self.src_ip, self.dst_ip, rate=self.installed_rate, ms=(time.time() - start)*1000)
+                return
+            self.applied_seq = seq
+            self.apply_rate(new_rate)
+            self.started()
+            self.log.info(event, self.sock_id, self.src_ip, self.dst_ip, rate=new_rate)
+            return
+        self.fetch_async(status, event, volume)
+
+    # adjust of fetch seq: replies the switch accounted but the flow never applied are taken off,
+    # unless the fetch inits and the switch starts the account over anyway
+    def take_adjust(self, status, seq):
+        unapplied, self.unapplied = self.unapplied, 0
+        if status == 0:
+            self.init_seq = seq
+            return 0
+        return -unapplied
+
+    # MB of an iteration sent to the switch: measured, 0 to use the job tables, None when neither knows it
+    def volume(self):
+        measured = self.learner.volume_mb()
+        if measured is not None and not self.args.table_volume:
+            return measured
+        tensor = flow_tensor_table.get(self.phy_src_ip, {}).get(self.phy_dst_ip)
+        if tensor is not None and tensor[1] > 0:
+            return 0
+        return None
+
+    # issue a fetch, its reply is applied in on_fetched
+    def fetch_async(self, status, event, volume):
+        self.fetch_seq += 1
+        seq, e, start = self.fetch_seq, self.bottle_e, time.time()
+        adjust = self.take_adjust(status, seq)
+        future = self.proxy.fetch_newrate_async(self.phy_src_ip, self.phy_dst_ip, status, e, plan=self.args.local_plan,
+                                                volume=volume, adjust=adjust, timeout=fetch_deadline(self.args))
+        future.add_done_callback(lambda future: self.on_fetched(future, seq, status, event, e, start, adjust))
+
+    # reply of an async fetch, on a grpc thread
+    def on_fetched(self, future, seq, status, event, e, start, adjust):
+        with self.lock:
+            if future.cancelled() or future.exception() is not None:
+                # keep the rate of the previous slot, the adjustment goes with the next fetch
+                self.unapplied -= adjust
+                self.init_missed = self.init_missed or status == 0
+                self.log.warn("missed", self.sock_id, self.src_ip, self.dst_ip, rate=self.installed_rate, ms=(time.time() - start)*1000)
+                return
+            if seq < self.applied_seq:
+                # the reply of a later fetch came first, this one is accounted on the switch all the same
+                if seq >= self.init_seq:
+                    self.unapplied += future.result().new_rate
+                return
+            self.applied_seq = seq
+            new_rate = self.take_reply(future.result(), e)
+            self.apply_rate(new_rate)
+            self.started()
+        self.log.info(event, self.sock_id, self.src_ip, self.dst_ip, rate=new_rate, ms=(time.time() - start)*1000)
+
+    # a rate of the switch was applied, the first one ends the start of the flow
+    def started(self):
+        if self.first_rate:
+            self.first_rate = False
+            flow_start_seconds["rate"].observe(time.time() - self.created)
+
+    # udpate rate into datapath, one netlink message, skipped when the installed rate is close enough
+    def apply_rate(self, new_rate):
+        if abs(new_rate - self.installed_rate) <= self.args.rate_tolerance * self.installed_rate:
+            rate_updates["suppressed"].inc()
+            return
+        self.dp.update_field("Rate", new_rate)
+        self.installed_rate = new_rate
+        rate_updates["sent"].inc()
+
+    # new rate from the switch, with local_plan the plan of the following slots is kept too
+    def fetch_rate(self, status, volume, adjust):
+        if not self.args.local_plan:
+            return self.proxy.fetch_newrate(self.phy_src_ip, self.phy_dst_ip, status, self.bottle_e, volume=volume, adjust=adjust).new_rate
+        reply = self.proxy.fetch_newrate(self.phy_src_ip, self.phy_dst_ip, status, self.bottle_e, plan=True, volume=volume, adjust=adjust)
+        return self.take_reply(reply, self.bottle_e)
+
+    # rate of a fetch made with estimated bandwidth e, keeping its plan
+    def take_reply(self, reply, e):
+        if self.args.local_plan:
+            self.plan, self.plan_start, self.plan_e = list(reply.plan), reply.plan_start_ms, e
+        return reply.new_rate
+
+    # rate of the current slot in the last plan, None to fetch again:
+    # the plan ran out, or the estimated bandwidth is no longer the one it was planned with
+    def step_plan(self):
+        if self.plan is None or not self.clock.synced:
+            return None
+        slot = max((self.clock.now() - self.plan_start) // self.args.time_slot, 0)
+        if slot >= len(self.plan) or abs(self.bottle_e - self.plan_e) > self.args.plan_tolerance * self.plan_e:
+            return None
+        return self.plan[slot]
 
     # judge whether its a new iteration flow
-    def is_next_iteration(self, data):
-        upper_volume = flow_tensor_table[self.phy_src_ip][self.phy_dst_ip][1] * self.iter_cur # M
-        upper_m = int(upper_volume % 1024) # M
-        upper_g = int(upper_volume / 1024) # G
-        if (data[0] > upper_g) or (data[0] == upper_g and data[1] > upper_m): 
-            self.iter_cur += 1
+    # nccl counts the iterations, the flow was scheduled for the first one when created,
+    # a restarted nccl process counts from 1 again
+    def is_next_iteration(self, progress):
+        if progress.iteration > self.iter_cur or 0 < progress.iteration < self.iter_cur:
+            self.iter_cur = progress.iteration
             return True
-            
         return False
 
-    # return unit byteps, int type
-    def obtain_e_from_T(self):
-        if self.report_count <= self.args.replay_slot:
-            return int(max(self.replay_rates)*125000)
-        else:
-            return int(max(self.replay_rates[self.report_count-self.args.replay_slot:])*125000)
-
     def cpu_interfernce(self, arr):
         def partition(arr, low, high):
             i = (low-1)
@@ -156,20 +376,66 @@ class MLCCFlow():
         quickSort(arr, 0, n-1)
 
 class Agent(portus.AlgBase):
-    def __init__(self, args):
+    # log: eventlog.EventLog the agent and its flows write to
+    def __init__(self, args, log):
         portus.AlgBase.__init__(self)
         self.args = args
+        self.log = log
         print("CCP Agent Starts ...")
+        self.proxy = BatchProxy(SWITCH_IP, SWITCH_PORT, args.time_slot, rpc_timeout(args)) if args.batch_fetch else None
+        self.stream = ControlStream(SWITCH_IP, SWITCH_PORT) if args.stream else None
+        # local until aligned with the switch in the background, the agent starts without waiting for it
+        self.clock = SlotClock(args.time_slot)
+        threading.Thread(target=self.connect_clock, daemon=True).start()
+        # jobs registered on the switch after this agent started, synced in the background, one sync at a time
+        self.registry = Registry()
+        self.syncing = threading.Lock()
+
+        # remove previous shared memory of the transmissions in the tables
+        keys = {shm_key(srcip, dstip) for srcip in flow_tensor_table for dstip in flow_tensor_table[srcip]}
+        print("Cleared %d stale progress segments." % remove_stale(keys))
 
-        # remove previous shared memory
-        info = os.popen("ipcs | grep xyzhao").read()
-        if len(info) > 0:
-            info_list = info.split('\n')
-            shm_num = len(info_list) - 1
-            for shm in range(shm_num):
-                key = int(info_list[shm].split(' ')[1])
-                os.system("ipcrm -m %d" % key)
-        print("Clear all existing shared memory.")
+    # align the slot clock with the switch, so slot boundaries agree on both sides,
+    # retried with backoff while the switch is unreachable
+    def connect_clock(self):
+        proxy = Proxy(SWITCH_IP, SWITCH_PORT, rpc_timeout(self.args) or CLOCK_TIMEOUT)
+        backoff = CLOCK_BACKOFF[0]
+        while True:
+            start = time.monotonic()
+            try:
+                reply = proxy.fetch_clock()
+                break
+            except grpc.RpcError as e:
+                print("Slot clock not aligned with switch (%s), retry in %.1f s" % (e.code(), backoff))
+                time.sleep(backoff)
+                backoff = min(backoff * 2, CLOCK_BACKOFF[1])
+        rtt_ms = int((time.monotonic() - start) * 1000)
+        self.clock.align(reply, rtt_ms)
+        print("Slot clock aligned with switch, epoch %d ms, rtt %d ms" % (reply.epoch_ms, rtt_ms))
+
+    def known(self, src_ip, dst_ip):
+        return src_ip in ip_transfer_table and dst_ip in ip_transfer_table and \
+            ip_transfer_table[dst_ip] in flow_tensor_table[ip_transfer_table[src_ip]]
+
+    # sync the jobs off the new flow callback, unless a sync is under way already
+    def request_sync(self):
+        if self.syncing.acquire(blocking=False):
+            threading.Thread(target=self.sync_jobs, daemon=True).start()
+
+    # learn the flows of jobs registered on the switch since the last sync, and forget removed ones
+    def sync_jobs(self):
+        try:
+            jobs = Proxy(SWITCH_IP, SWITCH_PORT, rpc_timeout(self.args) or CLOCK_TIMEOUT).fetch_jobs().jobs
+            with self.registry.lock:
+                for job in jobs:
+                    self.registry.add(job)
+                for name in set(self.registry.jobs) - {job.name for job in jobs}:
+                    self.registry.remove(name)
+            self.log.info("sync", n=len(self.registry.jobs))
+        except grpc.RpcError as e:
+            print("Jobs not synced with switch (%s)" % e.code())
+        finally:
+            self.syncing.release()
 
     def datapath_programs(self):
         return {
@@ -206,13 +472,23 @@ class Agent(portus.AlgBase):
     def new_flow(self, datapath, datapath_info):
         # judge whether is cross machine flow
         if (datapath_info.src_ip != datapath_info.dst_ip):
-            print(f"receive new inter flow- sid:{datapath_info.sock_id}, sip:{datapath_info.src_ip}, dip:{datapath_info.dst_ip}")
-            return MLCCFlow(datapath, datapath_info, self.args)
+            if not self.known(datapath_info.src_ip, datapath_info.dst_ip):
+                self.request_sync()
+            self.log.info("flow", datapath_info.sock_id, datapath_info.src_ip, datapath_info.dst_ip)
+            return MLCCFlow(datapath, datapath_info, self.args, self.log, self.proxy, self.stream, self.clock)
         # we only create MLCCFlow for cross machine flows
         # observe that intra rate is large, wont be affected by ccp option
 
 if __name__ == '__main__':
     args = parser.parse_args()
+    log = EventLog.from_args(args)
+    if args.local_plan and (args.batch_fetch or args.stream):
+        parser.error("--local_plan fetches on its own, without --batch_fetch or --stream")
+    if args.async_fetch and (args.batch_fetch or args.stream):
+        parser.error("--async_fetch fetches on its own, without --batch_fetch or --stream")
+
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
 
-    agent = Agent(args)
+    agent = Agent(args, log)
     portus.start("netlink", agent)
@@ -0,0 +1,707 @@
+"""
+    Scheduling state of the emulated switch: the load table, the allocators and the grpc
+    servicer. Shared by the single-process switch and the shards of a sharded one, all
+    importing this one module; switch.py only serves it.
+
+    Settings come from the switch arguments (add_arguments), applied with configure before
+    a channel is created. Importing it configures the defaults.
+"""
+import grpc
+import argparse
+import switch_pb2
+import switch_pb2_grpc
+from utils_p1p1 import *
+from clock import SlotClock
+from registry import Registry
+from topology import PathTable, load_topology
+import metrics
+import time
+import math
+import heapq
+import queue
+import asyncio
+import contextlib
+import threading
+import collections
+import numpy as np
+
+
+# increase cwnd and line rate, if NIC bandwidth increses
+def add_arguments(parser):
+    parser.add_argument('--time_slot', type=int, default=80, metavar='T',
+                        help='time interval of a slot (ms)')
+    parser.add_argument('--num_slot', type=int, default=10, metavar='K',
+                        help='K, the number of furture time slots to schedule')
+    parser.add_argument('--increase_factor', type=float, default=1.6, metavar='I',
+                        help='volume increase, let it transmit more instead of 0 to stop')
+    parser.add_argument('--decay_factor', type=float, default=1.0, metavar='D',
+                        help='applied rate = compute rate * decay, avoid additonal report problem')
+    parser.add_argument('--allocator', type=str, default='greedy', choices=['greedy', 'waterfill'],
+                        help='how volume is placed into the K slots, greedy or min-cost water-filling')
+    parser.add_argument('--lock_stripes', type=int, default=64, metavar='S',
+                        help='link locks of the load table, fetches on disjoint paths run in parallel')
+    parser.add_argument('--registry', type=str, default='',
+                        help='snapshot file of jobs registered at run time, loaded again on restart')
+    parser.add_argument('--topology', type=str, default='',
+                        help='fattree:K, leafspine:L,S,H or an edge list file, routes flows registered without a path')
+    parser.add_argument('--ecmp_ways', type=int, default=8, metavar='W',
+                        help='equal-cost paths kept per pair of top-of-rack switches, a flow takes one by hash')
+
+
+# scheduling arguments of argv, e.g. parse(["--num_slot", "20"]) from a benchmark
+def parse(argv):
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+# apply the switch arguments, before the load table and channel are created
+def configure(args):
+    global TIME_SLOT, K, VOLUME_INCREASE_FACTOR, DECAY_FACTOR, ALLOCATOR, LOCK_STRIPES, clock, paths, registry
+    TIME_SLOT = args.time_slot
+    K = args.num_slot
+    VOLUME_INCREASE_FACTOR = args.increase_factor
+    DECAY_FACTOR = args.decay_factor
+    ALLOCATOR = args.allocator
+    LOCK_STRIPES = args.lock_stripes
+
+    # monotonic ms since the switch started, agents align to it at connect
+    clock = SlotClock(TIME_SLOT)
+    # jobs registered at run time, their flows are added to the static tables
+    paths = PathTable(load_topology(args.topology), args.ecmp_ways) if args.topology else None
+    registry = Registry(args.registry or None, paths)
+
+configure(parse([]))
+
+# hot path metrics, always recorded, served with --metrics_port
+rpc_seconds = {method: metrics.Histogram("switch_rpc_seconds", "time serving an rpc", method=method)
+               for method in ("fetch", "fetchBatch")}
+costs_seconds = metrics.Histogram("switch_generate_costs_seconds", "time pricing the K slots of a fetch")
+allocate_seconds = metrics.Histogram("switch_allocate_seconds", "time scheduling a fetch into the K slots")
+queue_seconds = metrics.Histogram("switch_queue_wait_seconds", "time an rpc waits for a worker of the grpc pool")
+fetches = {status: metrics.Counter("switch_fetches_total", "fetches served", status=name)
+           for status, name in ((0, "init"), (1, "reschedule"), ("dry_run", "dry_run"))}
+
+# store schedule info of each srcip-dstip trans
+# a view on one row of the LoadTable arrays, so the table stays one dense block
+class Schedule():
+    def __init__(self, table, row, trans, registered):
+        self.table = table
+        self.row = row # row index in table.rates / table.T
+        self.trans = trans # (srcip, dstip)
+        self.registered = registered # time added to the table, ms
+        self.active = registered # time of the last fetch, ms
+        self.expires = registered + K * TIME_SLOT # time of its entry in the expiry heap, ms
+
+    @property
+    def rates(self):
+        return self.table.rates[self.row] # K-dim [rate per slot], bytes/s
+
+    @property
+    def T(self):
+        return int(self.table.T[self.row]) # time when allocated
+
+    @T.setter
+    def T(self, value):
+        self.table.T[self.row] = value
+
+    # idle once K slots passed since both its last allocation and its last fetch
+    def expiry(self):
+        return max(self.T, self.active) + K * TIME_SLOT
+
+
+# copy of a schedule outside the load table, a dry run allocates into it
+class Draft():
+    def __init__(self, schedule):
+        self.rates = schedule.rates.copy()
+        self.T = schedule.T
+
+
+class LoadTable():
+    # stripes: number of link locks, 0 when a single thread owns the table
+    # preload: register every transmission of the static tables, otherwise on first use
+    def __init__(self, stripes=None, preload=True) -> None:
+        stripes = LOCK_STRIPES if stripes is None else stripes
+        # link id % stripes -> lock, a transmission is updated holding the locks of every link on its path
+        self.stripes = [threading.Lock() for _ in range(stripes)] if stripes > 0 else None
+        # dense schedule state, one row per transmission: K-slot rates and allocation time
+        self.rates = np.zeros((16, K))
+        self.T = np.zeros(16, dtype=np.int64)
+        self.num_trans = 0 # rows handed out so far
+        self.free_rows = [] # rows of removed transmissions, reused first
+        # update the schedule of each transmission
+        self.trans_schedule = collections.defaultdict(dict)
+        # used for delta difference among dependent flow, reset when init, add when new rate
+        self.trans_accumulate = collections.defaultdict(dict)
+        # per-link index, link id -> {(srcip, dstip)} traversing it, so a cost query only touches its own path
+        self.link_index = collections.defaultdict(set)
+        # (srcip, dstip) -> rows whose schedules are priced into its costs, rebuilt when the index changes
+        self.peer_rows = {}
+        # heap of (time, srcip, dstip), when a schedule runs out K slots after it was made, swept once per slot
+        self.expiry = []
+        self.expiry_lock = threading.Lock()
+        self.next_sweep = 0
+        # called with (srcip, dstip) when a transmission is removed, for state kept outside the table
+        self.on_evict = None
+
+        if preload:
+            for srcip in flow_tensor_table.keys():
+                for dstip in flow_tensor_table[srcip].keys():
+                    self.add_trans(srcip, dstip)
+
+    # hold the locks of all links on the paths of trans [(srcip, dstip)], taken in order so no deadlock
+    # transmissions not in the table yet are registered first
+    @contextlib.contextmanager
+    def locked(self, trans):
+        self.sweep()
+        if self.stripes is None:
+            for srcip, dstip in trans:
+                self.add_trans(srcip, dstip)
+            yield
+            return
+        while True:
+            # read in the loop, a job registered in between may have changed the path
+            ids = sorted({link % len(self.stripes) for srcip, dstip in trans for link in link_id_tabel[srcip][dstip]})
+            for srcip, dstip in trans:
+                if not self.registered(srcip, dstip):
+                    self.add_trans(srcip, dstip)
+            for i in ids:
+                self.stripes[i].acquire()
+            if all(self.registered(srcip, dstip) for srcip, dstip in trans):
+                break
+            for i in reversed(ids): # swept or changed in between, register again
+                self.stripes[i].release()
+        try:
+            yield
+        finally:
+            for i in reversed(ids):
+                self.stripes[i].release()
+
+    # the whole table, for changes of its layout
+    @contextlib.contextmanager
+    def locked_all(self):
+        for stripe in self.stripes or []:
+            stripe.acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(self.stripes or []):
+                stripe.release()
+
+    def registered(self, srcip, dstip):
+        return dstip in self.trans_schedule.get(srcip, ())
+
+    # register a transmission and index it on every link of its path
+    def add_trans(self, srcip, dstip):
+        with self.locked_all():
+            if self.registered(srcip, dstip):
+                return
+            if self.free_rows:
+                row = self.free_rows.pop()
+                self.rates[row] = 0
+                self.T[row] = 0
+            else:
+                if self.num_trans == len(self.T):
+                    self.rates = np.concatenate((self.rates, np.zeros_like(self.rates)))
+                    self.T = np.concatenate((self.T, np.zeros_like(self.T)))
+                row = self.num_trans
+                self.num_trans += 1
+            schedule = Schedule(self, row, (srcip, dstip), clock.now())
+            self.trans_schedule[srcip][dstip] = schedule # init
+            self.trans_accumulate[srcip][dstip] = 0
+            for link in link_id_tabel[srcip][dstip]:
+                self.link_index[link].add((srcip, dstip))
+            self.peer_rows.clear()
+            self.expire_at(schedule.expires, (srcip, dstip)) # dropped if never fetched
+
+    # unregister a transmission, its row is reused by the next one added
+    def remove_trans(self, srcip, dstip):
+        with self.locked_all():
+            self.drop_trans(srcip, dstip)
+
+    # remove_trans, holding every stripe already
+    def drop_trans(self, srcip, dstip):
+        if dstip not in self.trans_schedule.get(srcip, ()):
+            return
+        self.free_rows.append(self.trans_schedule[srcip].pop(dstip).row)
+        del self.trans_accumulate[srcip][dstip]
+        if not self.trans_schedule[srcip]:
+            del self.trans_schedule[srcip]
+            del self.trans_accumulate[srcip]
+        for link in link_id_tabel[srcip][dstip]:
+            self.link_index[link].discard((srcip, dstip))
+            if not self.link_index[link]:
+                del self.link_index[link]
+        self.peer_rows.clear()
+        if self.on_evict is not None:
+            self.on_evict(srcip, dstip)
+
+    def expire_at(self, t, trans):
+        with self.expiry_lock:
+            heapq.heappush(self.expiry, (t, trans[0], trans[1]))
+
+    # remove transmissions idle for K slots, so the table holds live ones only
+    # runs at most once per slot, from the fetch that finds it due; a transmission has one entry in the heap,
+    # pushed back to its new expiry when it comes due while the transmission was fetched or rescheduled since
+    def sweep(self):
+        now = clock.now()
+        with self.expiry_lock:
+            if now < self.next_sweep or not self.expiry or self.expiry[0][0] > now:
+                return
+            self.next_sweep = now + TIME_SLOT
+        with self.locked_all():
+            while True:
+                with self.expiry_lock:
+                    if not self.expiry or self.expiry[0][0] > now:
+                        break
+                    t, srcip, dstip = heapq.heappop(self.expiry)
+                # entries of removed or re-registered transmissions are stale
+                schedule = self.trans_schedule.get(srcip, {}).get(dstip)
+                if schedule is None or schedule.expires != t:
+                    continue
+                if schedule.expiry() <= now:
+                    self.drop_trans(srcip, dstip)
+                else:
+                    schedule.expires = schedule.expiry()
+                    self.expire_at(schedule.expires, (srcip, dstip))
+
+    # link id -> rate reserved in the current slot by the live schedules crossing it, bytes/s
+    # read without the locks for metrics, retried if a registration changes the index meanwhile
+    def reserved(self):
+        while True:
+            rates, T = self.rates, self.T # swapped for larger arrays when rows run out
+            idx = np.trunc((clock.now() - T[:len(rates)]) / TIME_SLOT).astype(np.int64)
+            live = (idx >= 0) & (idx < K)
+            current = np.where(live, rates[np.arange(len(idx)), np.clip(idx, 0, K - 1)], 0)
+            try:
+                return {link: float(sum(current[self.trans_schedule[srcip][dstip].row] for srcip, dstip in list(trans)))
+                        for link, trans in list(self.link_index.items())}
+            except (RuntimeError, KeyError, IndexError):
+                continue
+
+    # other transmissions sharing at least one link with s-d
+    def crossing_trans(self, s, d):
+        crossing = set()
+        for link in link_id_tabel[s][d]:
+            crossing |= self.link_index[link]
+        crossing.discard((s, d))
+        return crossing
+
+    # transmissions priced into the costs of s-d, and the other way round: those from the same source,
+    # and with a topology those crossing one of its fabric links in the same direction
+    def peer_trans(self, s, d):
+        if paths is None:
+            return [(srcip, dstip) for srcip, dstip in self.crossing_trans(s, d) if srcip == s]
+        fabric = {link for link in link_id_tabel[s][d] if paths.fabric(link)}
+        return [(srcip, dstip) for srcip, dstip in self.crossing_trans(s, d)
+                if srcip == s or not fabric.isdisjoint(link_id_tabel[srcip][dstip])]
+
+    def get_peer_rows(self, s, d):
+        rows = self.peer_rows.get((s, d))
+        if rows is None:
+            rows = np.array(sorted(self.trans_schedule[srcip][dstip].row
+                                   for srcip, dstip in self.peer_trans(s, d)), dtype=np.int64)
+            self.peer_rows[(s, d)] = rows
+        return rows
+ 
+    # return ( [Phi_t] t\in K )
+    def generate_costs(self, s, d):
+        base_time = clock.now() # ms level
+        # fit other trans traversing same links into the schedule bucket
+        rows = self.get_peer_rows(s, d)
+        T = self.T[rows]
+        live = base_time <= (K * TIME_SLOT) + T # drop expired
+        rows, T = rows[live], T[live]
+        # possible base-T <0, but small negative, still 0
+        idx = np.maximum(np.trunc((base_time - T) / TIME_SLOT).astype(np.int64), 0)
+        # bucket j of the requester is slot idx+j of each peer schedule
+        slots = idx[:, None] + np.arange(K)
+        fit = slots < K
+        # future K slots prices
+        return np.where(fit, self.rates[rows[:, None], np.minimum(slots, K - 1)], 0).sum(axis=0)
+
+
+class Proto():
+    def __init__(self) -> None:
+        # fetches on disjoint paths run concurrently, each thread keeps its own notify flag
+        self.local = threading.local()
+        self.allocate = self.waterfill_allocate if ALLOCATOR == 'waterfill' else self.greedy_allocate
+
+    @property
+    def work_dep_notify(self):
+        return getattr(self.local, "work_dep_notify", False)
+
+    @work_dep_notify.setter
+    def work_dep_notify(self, value):
+        self.local.work_dep_notify = value
+
+    # based on current K buckets in switch, allocated rate volume into the schedule
+    # every possible_t candidate writes the same schedule, so the one that survives is the widest:
+    # the K-offset-1 cheapest buckets (ties to the earlier slot), each filled up to bound
+    def greedy_allocate(self, buckets, bound, volume, schedule, offset):
+        rates = schedule.rates
+        rates[offset:] = 0
+
+        order = np.argsort(buckets[:K-offset], kind='stable')[:max(K - offset - 1, 0)]
+        allocated = np.full(len(order), bound, dtype=float)
+        remain = volume - (np.cumsum(allocated) - allocated) # left before each bucket
+        used = remain > 0
+        rates[order[used] + offset] = np.minimum(allocated[used], remain[used])
+
+        if offset == 0:
+            schedule.T = clock.now()
+
+    # min-cost placement of volume into slots offset..K-1 with at most bound per slot,
+    # cost is linear in the rate so filling the cheapest slots first is exact, O(K log n) by heap selection
+    def waterfill_allocate(self, buckets, bound, volume, schedule, offset):
+        rates = np.zeros(K - offset)
+        if bound > 0 and volume > 0:
+            n = min(math.ceil(volume / bound), K - offset)
+            slots = heapq.nsmallest(n, range(K - offset), key=lambda j: (buckets[j], j))
+            rates[slots] = bound
+            rates[slots[-1]] = min(bound, volume - bound * (n - 1))
+        schedule.rates[offset:] = rates
+
+        if offset == 0:
+            schedule.T = clock.now()
+
+    def init_scheduling(self, costs, e, rate_volume, schedule):
+        offset = 0
+        self.allocate(costs, e, rate_volume, schedule, offset)
+        return schedule.rates[0]
+
+    # reschedule logic, greedy + dependent, update trans_schedule{}
+    def re_scheduling(self, costs, e, delta, untransmit, schedule):
+        current_time = clock.now()
+        offset = int((current_time - schedule.T)/TIME_SLOT)
+        if(offset >= K - 1):
+            return e
+
+        # dependency is not satisfied
+        if delta > 0:
+            # sending rate can’t be increased due to bottleneck 
+            if delta > e:
+                # set this slot rate e, (untransmit - e) rescheduled into future remaining slots
+                self.allocate(costs, e, untransmit-e, schedule, offset + 1)
+                self.work_dep_notify = True
+                return e
+            else:
+                # set this slot rate delta, (untransmit - delta) reschedule into future remaining slots
+                self.allocate(costs, e, untransmit-delta, schedule, offset + 1)
+                return delta
+        # dependency is satisfied
+        else:
+            self.allocate(costs, e, untransmit, schedule, offset)
+            return schedule.rates[offset]
+            # untransmit reschedule into future K with limit e.
+
+
+class Channel(switch_pb2_grpc.ChannelServicer):
+    def __init__(self, load_table=None) -> None:
+        super().__init__()
+        # transmissions are registered on their first fetch and removed once their schedule expires
+        self.load_table = load_table if load_table is not None else LoadTable(preload=False)
+        self.load_table.on_evict = self.forget
+        self.protocol = Proto()
+        self.reduce_notify = collections.defaultdict(dict)
+        # guards subscribers, the load table has its own link locks
+        self.lock = threading.Lock()
+        # control streams: (srcip, dstip) -> queue of replies pushed to its agent
+        self.subscribers = {}
+        # (srcip, dstip) -> last request and (time, rate added to accumulate) of the last reply
+        self.last_request = {}
+        self.applied = {}
+        # (srcip, dstip) -> (start, rates) of the last plan sent, for agents stepping it locally
+        self.planned = {}
+
+    def fetch(self, request, context):
+        start = time.perf_counter()
+        reply = self.schedule(request)
+        rpc_seconds["fetch"].observe(time.perf_counter() - start)
+        return reply
+
+    def getClock(self, request, context):
+        return switch_pb2.clockReply(epoch_ms = clock.epoch_ms, now_ms = clock.now(), time_slot = TIME_SLOT)
+
+    # a job is served from its flows' next fetch, flows it leaves unchanged keep their schedules
+    def registerJob(self, request, context):
+        num_flows = self.add_job(request)
+        registry.save()
+        return switch_pb2.jobReply(num_flows = num_flows)
+
+    def removeJob(self, request, context):
+        num_flows = self.remove_job(request.name)
+        registry.save()
+        return switch_pb2.jobReply(num_flows = num_flows)
+
+    def listJobs(self, request, context):
+        return registry.job_list()
+
+    # flows whose path or dependency changes are unregistered while the old path is still known
+    def add_job(self, job):
+        with self.load_table.locked_all():
+            for trans in registry.stale(job):
+                self.load_table.drop_trans(*trans)
+            return registry.add(job)
+
+    def remove_job(self, name):
+        with self.load_table.locked_all():
+            for trans in registry.flows(name):
+                self.load_table.drop_trans(*trans)
+            return registry.remove(name)
+
+    # rates of several transmissions computed on a single consistent view of the load table
+    def fetchBatch(self, request, context):
+        start = time.perf_counter()
+        trans = [t for r in request.requests for t in self.depends(r.srcip, r.dstip)]
+        with self.load_table.locked(trans):
+            reply = switch_pb2.batchReply(replies = [self.allocate_rate(r) for r in request.requests])
+        rpc_seconds["fetchBatch"].observe(time.perf_counter() - start)
+        return reply
+
+    # one stream per agent host, replies and proactive rate updates are pushed back on it
+    def control(self, request_iterator, context):
+        pushes = queue.Queue()
+        threading.Thread(target=self.serve_stream, args=(request_iterator, pushes), daemon=True).start()
+        return iter(pushes.get, None)
+
+    def serve_stream(self, request_iterator, pushes):
+        try:
+            for request in request_iterator:
+                with self.lock:
+                    self.subscribers[(request.srcip, request.dstip)] = pushes
+                self.deliver(self.schedule_and_notify(request))
+        except grpc.RpcError:
+            pass # agent went away
+        finally:
+            with self.lock:
+                for trans in [t for t, q in self.subscribers.items() if q is pushes]:
+                    del self.subscribers[trans]
+            pushes.put(None)
+
+    # [(trans, reply)] to send: the reply to the request, then rates pushed to its streamed peers
+    def schedule_and_notify(self, request):
+        trans = (request.srcip, request.dstip)
+        before = self.applied_rate(*trans)
+        reply = self.schedule(request)
+        reply.srcip, reply.dstip = trans
+        updates = [(trans, reply)]
+
+        # capacity is freed on shared links, reschedule streamed peers instead of waiting for their report
+        if reply.new_rate * DECAY_FACTOR < before:
+            for peer in self.peer_trans(*trans):
+                with self.lock:
+                    streamed = peer in self.subscribers
+                pushed = self.push(peer) if streamed else None
+                if pushed is not None:
+                    updates.append((peer, pushed))
+        return updates
+
+    # rate the last reply added to the accumulated rate of the transmission
+    def applied_rate(self, srcip, dstip):
+        return self.applied.get((srcip, dstip), (0, 0))[1]
+
+    # transmissions sharing links with srcip-dstip, the ones a rate it frees may be pushed to
+    def peer_trans(self, srcip, dstip):
+        return self.load_table.peer_trans(srcip, dstip)
+
+    # transmissions in the load table, for the metrics
+    def live_transmissions(self):
+        return self.load_table.num_trans - len(self.load_table.free_rows)
+
+    # link id -> rate reserved in the current slot, for the metrics
+    def reserved(self):
+        return self.load_table.reserved()
+
+    # put replies on the streams of their transmissions, under the lock a closing stream removes
+    # itself with, so nothing is put after its end; replies of streams gone meanwhile are dropped
+    def deliver(self, updates):
+        with self.lock:
+            for trans, reply in updates:
+                subscriber = self.subscribers.get(trans)
+                if subscriber is not None:
+                    subscriber.put_nowait(reply)
+
+    # None when the transmission has not fetched since it was registered
+    def push(self, trans):
+        with self.load_table.locked(self.depends(*trans)):
+            if trans not in self.last_request:
+                return None
+            # the pushed rate replaces the one already applied in this slot
+            applied_time, applied = self.applied[trans]
+            if clock.now() - applied_time < TIME_SLOT:
+                self.load_table.trans_accumulate[trans[0]][trans[1]] -= applied
+            request = self.last_request[trans]
+            reply = self.allocate_rate(switch_pb2.request(srcip=request.srcip, dstip=request.dstip, status=1, e=request.e,
+                                                                   volume=request.volume))
+        reply.srcip, reply.dstip = trans
+        return reply
+
+    # transmissions whose state a fetch of srcip-dstip reads or writes
+    def depends(self, srcip, dstip):
+        subseq = flow_subseq_table[srcip].get(dstip)
+        return [(srcip, dstip)] if subseq is None else [(srcip, dstip), subseq]
+
+    # read-modify-write of one transmission, atomic against fetches sharing any link with it or its subsequent flow
+    def schedule(self, request):
+        with self.load_table.locked(self.depends(request.srcip, request.dstip)):
+            return self.allocate_rate(request)
+
+    def allocate_rate(self, request):
+        # {t: Phi_t}, future K slots cost
+        start = time.perf_counter()
+        costs = self.load_table.generate_costs(request.srcip, request.dstip)
+        priced = time.perf_counter()
+        costs_seconds.observe(priced - start)
+
+        # total rate to be allocated, depend on model size
+        # measured by the agent when it sends one, otherwise profiled in the tables
+        volume = request.volume if request.volume > 0 else flow_tensor_table[request.srcip][request.dstip][1]
+        rate_volume = volume * 1e9 / TIME_SLOT * VOLUME_INCREASE_FACTOR # bytes/s
+        stale_schedule = self.load_table.trans_schedule[request.srcip][request.dstip]
+        # a dry run leaves the schedule, accumulated rates and notifications as they were
+        dry = request.dry_run
+        if dry:
+            stale_schedule = Draft(stale_schedule)
+        else:
+            stale_schedule.active = clock.now() # kept, with its accumulated rate, while the agent fetches
+
+        if(request.status == 0):
+            # generate init scheduled 
+            new_rate = self.protocol.init_scheduling(costs, request.e, rate_volume, stale_schedule)
+
+            # init new flow, reset accumulated list to the applied rate
+            if not dry:
+                self.load_table.trans_accumulate[request.srcip][request.dstip] = new_rate * DECAY_FACTOR
+
+        elif(request.status == 1):
+            if not dry:
+                if request.plan:
+                    self.credit_plan(request.srcip, request.dstip)
+                # rates the agent applied or dropped outside the replies counted so far
+                self.load_table.trans_accumulate[request.srcip][request.dstip] += request.adjust * DECAY_FACTOR
+
+            # calculate accumlated rate for this flow and subsequent flow
+            rate_accum = self.load_table.trans_accumulate[request.srcip][request.dstip]
+            # a flow without a subsequent one (ps broadcast) depends on nothing
+            subseq_tuple = flow_subseq_table[request.srcip].get(request.dstip)
+            if subseq_tuple is None:
+                delta = 0
+            else:
+                rate_accum_subseq = self.load_table.trans_accumulate[subseq_tuple[0]][subseq_tuple[1]]
+
+                # obtain difference, f should larger than its subsequent
+                delta = rate_accum_subseq - rate_accum
+
+            # obtain rate remained to be allocated
+            untransmit = rate_volume - rate_accum
+
+            # generate re scheduling, considering dependent flow
+            new_rate = self.protocol.re_scheduling(costs, request.e, delta, untransmit, stale_schedule)
+            if self.protocol.work_dep_notify:
+                # bottlenecked behind its dependency, the subsequent flow should slow down too
+                if not dry and subseq_tuple is not None:
+                    self.reduce_notify[subseq_tuple[0]][subseq_tuple[1]] = True
+                self.protocol.work_dep_notify = False
+            if self.reduce_notify[request.srcip].get(request.dstip):
+                new_rate = max(delta - request.e, 0)
+                if not dry:
+                    self.reduce_notify[request.srcip][request.dstip] = False
+
+            # add applied rate to accumlated list
+            if not dry:
+                self.load_table.trans_accumulate[request.srcip][request.dstip] += (new_rate * DECAY_FACTOR)
+
+        reply = switch_pb2.reply(new_rate = int(new_rate))
+        if not dry:
+            self.last_request[(request.srcip, request.dstip)] = request
+            self.applied[(request.srcip, request.dstip)] = (clock.now(), new_rate * DECAY_FACTOR)
+            if request.plan:
+                self.fill_plan(reply, request.srcip, request.dstip, new_rate, stale_schedule)
+        allocate_seconds.observe(time.perf_counter() - priced)
+        status = "dry_run" if dry else request.status
+        if status in fetches:
+            fetches[status].inc()
+        return reply
+
+    # drop the state of a transmission removed from the load table
+    def forget(self, srcip, dstip):
+        self.reduce_notify[srcip].pop(dstip, None)
+        self.last_request.pop((srcip, dstip), None)
+        self.applied.pop((srcip, dstip), None)
+        self.planned.pop((srcip, dstip), None)
+
+    # the new rate for the current slot followed by the rest of the schedule, so the agent
+    # steps through it on its own and fetches again when it runs out
+    def fill_plan(self, reply, srcip, dstip, new_rate, schedule):
+        offset = (clock.now() - schedule.T) // TIME_SLOT
+        reply.plan_start_ms = schedule.T + offset * TIME_SLOT
+        reply.plan.append(int(new_rate))
+        if offset < K - 1: # otherwise expired, one slot only
+            reply.plan.extend(schedule.rates[offset + 1:].astype(np.int64).tolist())
+        self.planned[(srcip, dstip)] = (reply.plan_start_ms, list(reply.plan))
+
+    # slots of the last plan the agent stepped through without fetching count as applied,
+    # the first one was added when the plan was sent and the current one is being replaced
+    def credit_plan(self, srcip, dstip):
+        start, plan = self.planned.pop((srcip, dstip), (0, []))
+        stepped = plan[1:max((clock.now() - start) // TIME_SLOT, 0)]
+        self.load_table.trans_accumulate[srcip][dstip] += sum(stepped) * DECAY_FACTOR
+
+
+class AioChannel(Channel):
+    """
+        Channel served by grpc.aio. Every rpc runs on the one event loop that owns the
+        load table, so there is no lock and no thread hand-off per call.
+    """
+    def __init__(self) -> None:
+        super().__init__(LoadTable(stripes=0, preload=False))
+        self.lock = contextlib.nullcontext()
+
+    async def fetch(self, request, context):
+        start = time.perf_counter()
+        reply = self.schedule(request)
+        rpc_seconds["fetch"].observe(time.perf_counter() - start)
+        return reply
+
+    async def getClock(self, request, context):
+        return Channel.getClock(self, request, context)
+
+    async def registerJob(self, request, context):
+        return Channel.registerJob(self, request, context)
+
+    async def removeJob(self, request, context):
+        return Channel.removeJob(self, request, context)
+
+    async def listJobs(self, request, context):
+        return Channel.listJobs(self, request, context)
+
+    async def fetchBatch(self, request, context):
+        start = time.perf_counter()
+        reply = switch_pb2.batchReply(replies = [self.schedule(r) for r in request.requests])
+        rpc_seconds["fetchBatch"].observe(time.perf_counter() - start)
+        return reply
+
+    async def control(self, request_iterator, context):
+        pushes = asyncio.Queue()
+        reader = asyncio.ensure_future(self.serve_stream(request_iterator, pushes))
+        try:
+            while True:
+                reply = await pushes.get()
+                if reply is None:
+                    break
+                yield reply
+        finally:
+            reader.cancel()
+
+    async def serve_stream(self, request_iterator, pushes):
+        try:
+            async for request in request_iterator:
+                self.subscribers[(request.srcip, request.dstip)] = pushes
+                self.deliver(self.schedule_and_notify(request))
+        except grpc.RpcError:
+            pass # agent went away
+        finally:
+            for trans in [t for t, q in self.subscribers.items() if q is pushes]:
+                del self.subscribers[trans]
+            pushes.put_nowait(None)
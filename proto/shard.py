@@ -0,0 +1,268 @@
+"""
+    Sharded switch, scheduling state partitioned by link id across worker processes.
+
+    A transmission lives on the shard owning the first link of its path (its home), which keeps
+    its schedule and accumulated rate. The front-end serves grpc, routes each fetch to the home
+    shard, and merges partial costs from the other shards holding transmissions priced into it.
+    Control streams end on the front-end, rates pushed to streamed peers are routed the same way.
+"""
+import time
+import threading
+import collections
+import multiprocessing
+import scheduler
+from scheduler import switch_pb2, switch_pb2_grpc, link_id_tabel, flow_subseq_table, flow_tensor_table
+
+
+def home_shard(srcip, dstip, num_shards):
+    return link_id_tabel[srcip][dstip][0] % num_shards
+
+
+# load table holding only the transmissions homed on one shard
+class ShardTable(scheduler.LoadTable):
+    def __init__(self, shard, num_shards) -> None:
+        self.shard = shard
+        self.num_shards = num_shards
+        # costs of the same slots from the other shards, added for the fetch being served
+        self.extra_costs = None
+        super().__init__(stripes=0, preload=False) # served by one thread
+
+    def add_trans(self, srcip, dstip):
+        if home_shard(srcip, dstip, self.num_shards) == self.shard:
+            super().add_trans(srcip, dstip)
+
+    # transmissions homed elsewhere are held by their own shard
+    def registered(self, srcip, dstip):
+        return home_shard(srcip, dstip, self.num_shards) != self.shard or super().registered(srcip, dstip)
+
+    def generate_costs(self, s, d):
+        costs = super().generate_costs(s, d)
+        return costs if self.extra_costs is None else costs + self.extra_costs
+
+
+class ShardChannel(scheduler.Channel):
+    def __init__(self, shard, num_shards) -> None:
+        super().__init__(ShardTable(shard, num_shards))
+        self.shard = shard
+        self.num_shards = num_shards
+
+    def partial_costs(self, s, d):
+        return scheduler.LoadTable.generate_costs(self.load_table, s, d)
+
+    def accumulate(self, srcip, dstip):
+        return self.load_table.trans_accumulate[srcip].get(dstip, 0)
+
+    def notify(self, srcip, dstip):
+        self.reduce_notify[srcip][dstip] = True
+
+    # extra_costs: costs from other shards, subseq_accum: accumulated rate of a subsequent flow homed elsewhere
+    # return the reply, and the subsequent flow to notify on its own shard, if any
+    def schedule_remote(self, request, extra_costs, subseq_accum):
+        return self.remote(lambda: self.schedule(request), request.srcip, request.dstip, extra_costs, subseq_accum)
+
+    # the rate pushed to a streamed transmission, priced as schedule_remote; None if it never fetched
+    def push_remote(self, trans, extra_costs, subseq_accum):
+        return self.remote(lambda: self.push(trans), trans[0], trans[1], extra_costs, subseq_accum)
+
+    def remote(self, serve, srcip, dstip, extra_costs, subseq_accum):
+        subseq = flow_subseq_table[srcip].get(dstip)
+        remote_subseq = subseq is not None and home_shard(subseq[0], subseq[1], self.num_shards) != self.shard
+        if subseq_accum is not None:
+            self.load_table.trans_accumulate[subseq[0]][subseq[1]] = subseq_accum # mirror, read only here
+
+        self.load_table.extra_costs = extra_costs
+        try:
+            reply = serve()
+        finally:
+            self.load_table.extra_costs = None
+
+        if remote_subseq and self.reduce_notify[subseq[0]].get(subseq[1]):
+            self.reduce_notify[subseq[0]][subseq[1]] = False
+            return reply, subseq
+        return reply, None
+
+
+# inherited: front-end ends of the pipes forked so far, closed so the shard sees EOF when the front-end exits
+def serve_shard(shard, num_shards, conn, inherited):
+    for pipe in inherited:
+        pipe.close()
+    channel = ShardChannel(shard, num_shards)
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            break
+        if msg is None:
+            break
+        op, args = msg
+        try:
+            conn.send((getattr(channel, op)(*args), None))
+        except Exception as e:
+            conn.send((None, e))
+
+
+# transmissions of the tables by link, for routing: which shards hold transmissions priced into a fetch.
+# No schedule is kept, so nothing expires; transmissions leave when their job does
+class RouteIndex():
+    def __init__(self) -> None:
+        self.link_index = collections.defaultdict(set) # link id -> {(srcip, dstip)} traversing it
+        self.lock = threading.Lock() # jobs change it while fetches read it
+        for srcip in flow_tensor_table.keys():
+            for dstip in flow_tensor_table[srcip].keys():
+                self.add_trans(srcip, dstip)
+
+    def add_trans(self, srcip, dstip):
+        with self.lock:
+            for link in link_id_tabel[srcip][dstip]:
+                self.link_index[link].add((srcip, dstip))
+
+    def remove_trans(self, srcip, dstip):
+        with self.lock:
+            for link in link_id_tabel[srcip].get(dstip, ()):
+                self.link_index[link].discard((srcip, dstip))
+                if not self.link_index[link]:
+                    del self.link_index[link]
+
+    # the same peers as the load table finds
+    def peer_trans(self, s, d):
+        with self.lock:
+            return scheduler.LoadTable.peer_trans(self, s, d)
+
+    crossing_trans = scheduler.LoadTable.crossing_trans
+
+
+class ShardedChannel(switch_pb2_grpc.ChannelServicer):
+    def __init__(self, num_shards) -> None:
+        super().__init__()
+        self.num_shards = num_shards
+        self.index = RouteIndex()
+        # control streams: (srcip, dstip) -> queue of replies pushed to its agent, guarded by lock
+        self.lock = threading.Lock()
+        self.subscribers = {}
+        self.pipes = []
+        self.locks = []
+        ctx = multiprocessing.get_context("fork")
+        for shard in range(num_shards):
+            parent, child = ctx.Pipe()
+            ctx.Process(target=serve_shard, args=(shard, num_shards, child, self.pipes + [parent]), daemon=True).start()
+            child.close()
+            self.pipes.append(parent)
+            self.locks.append(threading.Lock())
+
+    # one outstanding message per shard pipe, errors in the shard are raised here
+    def call(self, shard, op, *args):
+        with self.locks[shard]:
+            self.pipes[shard].send((op, args))
+            result, error = self.pipes[shard].recv()
+        if error is not None:
+            raise error
+        return result
+
+    def fetch(self, request, context):
+        start = time.perf_counter()
+        reply = self.route(request)
+        scheduler.rpc_seconds["fetch"].observe(time.perf_counter() - start)
+        return reply
+
+    # shards are forked from the front-end and share its clock
+    getClock = scheduler.Channel.getClock
+    listJobs = scheduler.Channel.listJobs
+
+    # streams are served here as by one channel, with fetches and pushes routed to the shards
+    control = scheduler.Channel.control
+    serve_stream = scheduler.Channel.serve_stream
+    schedule_and_notify = scheduler.Channel.schedule_and_notify
+    deliver = scheduler.Channel.deliver
+
+    # every shard updates its own copy of the tables, then the routing index is updated here
+    def registerJob(self, request, context):
+        stale = scheduler.registry.stale(request)
+        for shard in range(self.num_shards):
+            self.call(shard, "add_job", request)
+        for srcip, dstip in stale:
+            self.index.remove_trans(srcip, dstip)
+        num_flows = scheduler.registry.add(request)
+        for flow in request.flows:
+            self.index.add_trans(flow.srcip, flow.dstip)
+        self.restored(stale)
+        scheduler.registry.save()
+        return switch_pb2.jobReply(num_flows = num_flows)
+
+    def removeJob(self, request, context):
+        for shard in range(self.num_shards):
+            self.call(shard, "remove_job", request.name)
+        removed = scheduler.registry.flows(request.name)
+        for srcip, dstip in removed:
+            self.index.remove_trans(srcip, dstip)
+        num_flows = scheduler.registry.remove(request.name)
+        self.restored(removed)
+        scheduler.registry.save()
+        return switch_pb2.jobReply(num_flows = num_flows)
+
+    # static flows the registry gave back when their job dropped them are routed again
+    def restored(self, trans):
+        for srcip, dstip in trans:
+            if dstip in flow_tensor_table.get(srcip, ()):
+                self.index.add_trans(srcip, dstip)
+
+    def fetchBatch(self, request, context):
+        start = time.perf_counter()
+        reply = switch_pb2.batchReply(replies = [self.route(r) for r in request.requests])
+        scheduler.rpc_seconds["fetchBatch"].observe(time.perf_counter() - start)
+        return reply
+
+    def route(self, request):
+        home, extra_costs, subseq_accum = self.prepare(request.srcip, request.dstip, request.status)
+        reply, notify = self.call(home, "schedule_remote", request, extra_costs, subseq_accum)
+        self.forward(notify)
+        return reply
+
+    schedule = route
+
+    # rate pushed to a streamed transmission, from its home shard
+    def push(self, trans):
+        home, extra_costs, subseq_accum = self.prepare(trans[0], trans[1], 1)
+        reply, notify = self.call(home, "push_remote", trans, extra_costs, subseq_accum)
+        self.forward(notify)
+        return reply
+
+    # home shard of s-d, costs from transmissions homed on other shards, and the accumulated
+    # rate of its subsequent flow when another shard holds it
+    def prepare(self, s, d, status):
+        home = home_shard(s, d, self.num_shards)
+
+        # merge costs from transmissions homed on other shards
+        remote = {home_shard(srcip, dstip, self.num_shards) for srcip, dstip in self.index.peer_trans(s, d)} - {home}
+        extra_costs = None
+        for shard in remote:
+            costs = self.call(shard, "partial_costs", s, d)
+            extra_costs = costs if extra_costs is None else extra_costs + costs
+
+        subseq_accum = None
+        subseq = flow_subseq_table[s].get(d)
+        if status == 1 and subseq is not None:
+            subseq_home = home_shard(subseq[0], subseq[1], self.num_shards)
+            if subseq_home != home:
+                subseq_accum = self.call(subseq_home, "accumulate", subseq[0], subseq[1])
+        return home, extra_costs, subseq_accum
+
+    # notify the subsequent flow a shard reported, on its own shard
+    def forward(self, notify):
+        if notify is not None:
+            self.call(home_shard(notify[0], notify[1], self.num_shards), "notify", notify[0], notify[1])
+
+    def applied_rate(self, srcip, dstip):
+        return self.call(home_shard(srcip, dstip, self.num_shards), "applied_rate", srcip, dstip)
+
+    def peer_trans(self, srcip, dstip):
+        return self.index.peer_trans(srcip, dstip)
+
+    def live_transmissions(self):
+        return sum(self.call(shard, "live_transmissions") for shard in range(self.num_shards))
+
+    # a link is reserved on by transmissions of several shards
+    def reserved(self):
+        reserved = collections.Counter()
+        for shard in range(self.num_shards):
+            reserved.update(self.call(shard, "reserved"))
+        return dict(reserved)
@@ -1,14 +1,20 @@
 import sys
+import argparse
 import pyportus as portus
-import datetime
+from eventlog import EventLog, add_arguments as add_log_arguments
+
+parser = argparse.ArgumentParser(description='Run Static Agent')
+add_log_arguments(parser)
 
 class StaticFlow():
     INIT_RATE = 10 * 125000000 # Gbps travet to byteps, overflow when 30*125000000
     INIT_CWND = 10
 
-    def __init__(self, datapath, datapath_info):
+    # log: eventlog.EventLog of the agent
+    def __init__(self, datapath, datapath_info, log):
         self.datapath = datapath
         self.datapath_info = datapath_info
+        self.log = log
 
         self.init_cwnd = float(self.datapath_info.mss * StaticFlow.INIT_CWND)
         self.cwnd = self.init_cwnd
@@ -16,23 +22,23 @@ class StaticFlow():
         self.rate = StaticFlow.INIT_RATE
         self.datapath.set_program("default", [("Rate", self.rate), ("Cwnd", int(self.cwnd)*1500)])
         
+        # mean reported rate over the life of the flow, byteps
         self.avg_report_rate = 0
         self.report_count = 0
 
     def on_report(self, r):
-        print("receive report: ", self.datapath_info.sock_id, self.datapath_info.src_ip, self.datapath_info.dst_ip)
-        rate_mbps = r.rate/125000
-        print("rate(Mbps): ", rate_mbps)
         self.report_count += 1
-
-        self.avg_report_rate = (self.avg_report_rate*(self.report_count - 1) + rate_mbps) / self.report_count
-        print("avg_rate = ", self.avg_report_rate)
-
-        if((datetime.datetime.now()-self.timer).microseconds > 100*1000):
-            print("receive report")
-            self.timer = datetime.datetime.now()
+        self.avg_report_rate += (r.rate - self.avg_report_rate) / self.report_count
+        info = self.datapath_info
+        self.log.debug("report", info.sock_id, info.src_ip, info.dst_ip, rate=r.rate)
+        self.log.debug("average", info.sock_id, info.src_ip, info.dst_ip, rate=int(self.avg_report_rate))
 
 class Static(portus.AlgBase):
+    # log: eventlog.EventLog the agent and its flows write to
+    def __init__(self, log):
+        portus.AlgBase.__init__(self)
+        self.log = log
+
     def datapath_programs(self):
         return {
                 "default" : """\
@@ -68,5 +74,13 @@ class Static(portus.AlgBase):
         }
     
     def new_flow(self, datapath, datapath_info):
-        print("receive new flow: ", datapath_info.sock_id, datapath_info.src_ip, datapath_info.dst_ip)
-        return StaticFlow(datapath, datapath_info)
+        self.log.info("flow", datapath_info.sock_id, datapath_info.src_ip, datapath_info.dst_ip)
+        return StaticFlow(datapath, datapath_info, self.log)
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    log = EventLog.from_args(args)
+
+    print("Static Agent Starts ...")
+    portus.start("netlink", Static(log))
@@ -12,7 +12,7 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   syntax='proto3',
   serialized_options=b'\n\025io.grpc.examples.testB\013SwitchProtoP\001\242\002\006Switch',
   create_key=_descriptor._internal_create_key,
-  serialized_pb=b'\n\x0cswitch.proto\x12\x06switch\"B\n\x07request\x12\r\n\x05srcip\x18\x01 \x01(\t\x12\r\n\x05\x64stip\x18\x02 \x01(\t\x12\x0e\n\x06status\x18\x03 \x01(\x05\x12\t\n\x01\x65\x18\x04 \x01(\x03\"\x19\n\x05reply\x12\x10\n\x08new_rate\x18\x01 \x01(\x03\x32\x34\n\x07\x43hannel\x12)\n\x05\x66\x65tch\x12\x0f.switch.request\x1a\r.switch.reply\"\x00\x42/\n\x15io.grpc.examples.testB\x0bSwitchProtoP\x01\xa2\x02\x06Switchb\x06proto3'
+  serialized_pb=b'\n\x0cswitch.proto\x12\x06switch\"\x81\x01\n\x07request\x12\r\n\x05srcip\x18\x01 \x01(\t\x12\r\n\x05\x64stip\x18\x02 \x01(\t\x12\x0e\n\x06status\x18\x03 \x01(\x05\x12\t\n\x01\x65\x18\x04 \x01(\x03\x12\x0c\n\x04plan\x18\x05 \x01(\x08\x12\x0e\n\x06volume\x18\x06 \x01(\x01\x12\x0f\n\x07\x64ry_run\x18\x07 \x01(\x08\x12\x0e\n\x06\x61\x64just\x18\x08 \x01(\x03\"\\\n\x05reply\x12\x10\n\x08new_rate\x18\x01 \x01(\x03\x12\r\n\x05srcip\x18\x02 \x01(\t\x12\r\n\x05\x64stip\x18\x03 \x01(\t\x12\x0c\n\x04plan\x18\x04 \x03(\x03\x12\x15\n\rplan_start_ms\x18\x05 \x01(\x03\"1\n\x0c\x62\x61tchRequest\x12!\n\x08requests\x18\x01 \x03(\x0b\x32\x0f.switch.request\",\n\nbatchReply\x12\x1e\n\x07replies\x18\x01 \x03(\x0b\x32\r.switch.reply\"\x0e\n\x0c\x63lockRequest\"A\n\nclockReply\x12\x10\n\x08\x65poch_ms\x18\x01 \x01(\x03\x12\x0e\n\x06now_ms\x18\x02 \x01(\x03\x12\x11\n\ttime_slot\x18\x03 \x01(\x05\"o\n\x04\x66low\x12\r\n\x05srcip\x18\x01 \x01(\t\x12\r\n\x05\x64stip\x18\x02 \x01(\t\x12\x0e\n\x06volume\x18\x03 \x01(\x03\x12\r\n\x05links\x18\x04 \x03(\x05\x12\x14\n\x0csubseq_srcip\x18\x05 \x01(\t\x12\x14\n\x0csubseq_dstip\x18\x06 \x01(\t\"\xa4\x01\n\x03job\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12\x1b\n\x05\x66lows\x18\x03 \x03(\x0b\x32\x0c.switch.flow\x12\x30\n\x0bip_transfer\x18\x04 \x03(\x0b\x32\x1b.switch.job.IpTransferEntry\x1a\x31\n\x0fIpTransferEntry\x12\x0b\n\x03key\x18\x01 \x01(\x03\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x1d\n\x08jobReply\x12\x11\n\tnum_flows\x18\x01 \x01(\x05\"\r\n\x0bjobsRequest\"$\n\x07jobList\x12\x19\n\x04jobs\x18\x01 \x03(\x0b\x32\x0b.switch.job2\xe9\x02\n\x07\x43hannel\x12)\n\x05\x66\x65tch\x12\x0f.switch.request\x1a\r.switch.reply\"\x00\x12\x38\n\nfetchBatch\x12\x14.switch.batchRequest\x1a\x12.switch.batchReply\"\x00\x12/\n\x07\x63ontrol\x12\x0f.switch.request\x1a\r.switch.reply\"\x00(\x01\x30\x01\x12\x36\n\x08getClock\x12\x14.switch.clockRequest\x1a\x12.switch.clockReply\"\x00\x12.\n\x0bregisterJob\x12\x0b.switch.job\x1a\x10.switch.jobReply\"\x00\x12,\n\tremoveJob\x12\x0b.switch.job\x1a\x10.switch.jobReply\"\x00\x12\x32\n\x08listJobs\x12\x13.switch.jobsRequest\x1a\x0f.switch.jobList\"\x00\x42/\n\x15io.grpc.examples.testB\x0bSwitchProtoP\x01\xa2\x02\x06Switchb\x06proto3'
 )
 
 _REQUEST = _descriptor.Descriptor(
@@ -51,6 +51,34 @@ _REQUEST = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='plan', full_name='switch.request.plan', index=4,
+      number=5, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='volume', full_name='switch.request.volume', index=5,
+      number=6, type=1, cpp_type=5, label=1,
+      has_default_value=False, default_value=float(0),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='dry_run', full_name='switch.request.dry_run', index=6,
+      number=7, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='adjust', full_name='switch.request.adjust', index=7,
+      number=8, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -63,8 +91,8 @@ _REQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=24,
-  serialized_end=90,
+  serialized_start=25,
+  serialized_end=154,
 )
 
 
@@ -83,6 +111,236 @@ _REPLY = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='srcip', full_name='switch.reply.srcip', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='dstip', full_name='switch.reply.dstip', index=2,
+      number=3, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='plan', full_name='switch.reply.plan', index=3,
+      number=4, type=3, cpp_type=2, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='plan_start_ms', full_name='switch.reply.plan_start_ms', index=4,
+      number=5, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=156,
+  serialized_end=248,
+)
+
+
+_BATCHREQUEST = _descriptor.Descriptor(
+  name='batchRequest',
+  full_name='switch.batchRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='requests', full_name='switch.batchRequest.requests', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=250,
+  serialized_end=299,
+)
+
+
+_BATCHREPLY = _descriptor.Descriptor(
+  name='batchReply',
+  full_name='switch.batchReply',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='replies', full_name='switch.batchReply.replies', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=301,
+  serialized_end=345,
+)
+
+
+_CLOCKREQUEST = _descriptor.Descriptor(
+  name='clockRequest',
+  full_name='switch.clockRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=347,
+  serialized_end=361,
+)
+
+
+_CLOCKREPLY = _descriptor.Descriptor(
+  name='clockReply',
+  full_name='switch.clockReply',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='epoch_ms', full_name='switch.clockReply.epoch_ms', index=0,
+      number=1, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='now_ms', full_name='switch.clockReply.now_ms', index=1,
+      number=2, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='time_slot', full_name='switch.clockReply.time_slot', index=2,
+      number=3, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=363,
+  serialized_end=428,
+)
+
+
+_FLOW = _descriptor.Descriptor(
+  name='flow',
+  full_name='switch.flow',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='srcip', full_name='switch.flow.srcip', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='dstip', full_name='switch.flow.dstip', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='volume', full_name='switch.flow.volume', index=2,
+      number=3, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='links', full_name='switch.flow.links', index=3,
+      number=4, type=5, cpp_type=1, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='subseq_srcip', full_name='switch.flow.subseq_srcip', index=4,
+      number=5, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='subseq_dstip', full_name='switch.flow.subseq_dstip', index=5,
+      number=6, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -95,12 +353,207 @@ _REPLY = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=92,
-  serialized_end=117,
+  serialized_start=430,
+  serialized_end=541,
 )
 
+
+_JOB_IPTRANSFERENTRY = _descriptor.Descriptor(
+  name='IpTransferEntry',
+  full_name='switch.job.IpTransferEntry',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='key', full_name='switch.job.IpTransferEntry.key', index=0,
+      number=1, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='value', full_name='switch.job.IpTransferEntry.value', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=b'8\001',
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=659,
+  serialized_end=708,
+)
+
+_JOB = _descriptor.Descriptor(
+  name='job',
+  full_name='switch.job',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='name', full_name='switch.job.name', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='model', full_name='switch.job.model', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='flows', full_name='switch.job.flows', index=2,
+      number=3, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='ip_transfer', full_name='switch.job.ip_transfer', index=3,
+      number=4, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[_JOB_IPTRANSFERENTRY, ],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=544,
+  serialized_end=708,
+)
+
+
+_JOBREPLY = _descriptor.Descriptor(
+  name='jobReply',
+  full_name='switch.jobReply',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='num_flows', full_name='switch.jobReply.num_flows', index=0,
+      number=1, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=710,
+  serialized_end=739,
+)
+
+
+_JOBSREQUEST = _descriptor.Descriptor(
+  name='jobsRequest',
+  full_name='switch.jobsRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=741,
+  serialized_end=754,
+)
+
+
+_JOBLIST = _descriptor.Descriptor(
+  name='jobList',
+  full_name='switch.jobList',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='jobs', full_name='switch.jobList.jobs', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=756,
+  serialized_end=792,
+)
+
+_BATCHREQUEST.fields_by_name['requests'].message_type = _REQUEST
+_BATCHREPLY.fields_by_name['replies'].message_type = _REPLY
+_JOB_IPTRANSFERENTRY.containing_type = _JOB
+_JOB.fields_by_name['flows'].message_type = _FLOW
+_JOB.fields_by_name['ip_transfer'].message_type = _JOB_IPTRANSFERENTRY
+_JOBLIST.fields_by_name['jobs'].message_type = _JOB
 DESCRIPTOR.message_types_by_name['request'] = _REQUEST
 DESCRIPTOR.message_types_by_name['reply'] = _REPLY
+DESCRIPTOR.message_types_by_name['batchRequest'] = _BATCHREQUEST
+DESCRIPTOR.message_types_by_name['batchReply'] = _BATCHREPLY
+DESCRIPTOR.message_types_by_name['clockRequest'] = _CLOCKREQUEST
+DESCRIPTOR.message_types_by_name['clockReply'] = _CLOCKREPLY
+DESCRIPTOR.message_types_by_name['flow'] = _FLOW
+DESCRIPTOR.message_types_by_name['job'] = _JOB
+DESCRIPTOR.message_types_by_name['jobReply'] = _JOBREPLY
+DESCRIPTOR.message_types_by_name['jobsRequest'] = _JOBSREQUEST
+DESCRIPTOR.message_types_by_name['jobList'] = _JOBLIST
 _sym_db.RegisterFileDescriptor(DESCRIPTOR)
 
 request = _reflection.GeneratedProtocolMessageType('request', (_message.Message,), {
@@ -117,8 +570,80 @@ reply = _reflection.GeneratedProtocolMessageType('reply', (_message.Message,), {
   })
 _sym_db.RegisterMessage(reply)
 
+batchRequest = _reflection.GeneratedProtocolMessageType('batchRequest', (_message.Message,), {
+  'DESCRIPTOR' : _BATCHREQUEST,
+  '__module__' : 'switch_pb2'
+  # @@protoc_insertion_point(class_scope:switch.batchRequest)
+  })
+_sym_db.RegisterMessage(batchRequest)
+
+batchReply = _reflection.GeneratedProtocolMessageType('batchReply', (_message.Message,), {
+  'DESCRIPTOR' : _BATCHREPLY,
+  '__module__' : 'switch_pb2'
+  # @@protoc_insertion_point(class_scope:switch.batchReply)
+  })
+_sym_db.RegisterMessage(batchReply)
+
+clockRequest = _reflection.GeneratedProtocolMessageType('clockRequest', (_message.Message,), {
+  'DESCRIPTOR' : _CLOCKREQUEST,
+  '__module__' : 'switch_pb2'
+  # @@protoc_insertion_point(class_scope:switch.clockRequest)
+  })
+_sym_db.RegisterMessage(clockRequest)
+
+clockReply = _reflection.GeneratedProtocolMessageType('clockReply', (_message.Message,), {
+  'DESCRIPTOR' : _CLOCKREPLY,
+  '__module__' : 'switch_pb2'
+  # @@protoc_insertion_point(class_scope:switch.clockReply)
+  })
+_sym_db.RegisterMessage(clockReply)
+
+flow = _reflection.GeneratedProtocolMessageType('flow', (_message.Message,), {
+  'DESCRIPTOR' : _FLOW,
+  '__module__' : 'switch_pb2'
+  # @@protoc_insertion_point(class_scope:switch.flow)
+  })
+_sym_db.RegisterMessage(flow)
+
+job = _reflection.GeneratedProtocolMessageType('job', (_message.Message,), {
+
+  'IpTransferEntry' : _reflection.GeneratedProtocolMessageType('IpTransferEntry', (_message.Message,), {
+    'DESCRIPTOR' : _JOB_IPTRANSFERENTRY,
+    '__module__' : 'switch_pb2'
+    # @@protoc_insertion_point(class_scope:switch.job.IpTransferEntry)
+    })
+  ,
+  'DESCRIPTOR' : _JOB,
+  '__module__' : 'switch_pb2'
+  # @@protoc_insertion_point(class_scope:switch.job)
+  })
+_sym_db.RegisterMessage(job)
+_sym_db.RegisterMessage(job.IpTransferEntry)
+
+jobReply = _reflection.GeneratedProtocolMessageType('jobReply', (_message.Message,), {
+  'DESCRIPTOR' : _JOBREPLY,
+  '__module__' : 'switch_pb2'
+  # @@protoc_insertion_point(class_scope:switch.jobReply)
+  })
+_sym_db.RegisterMessage(jobReply)
+
+jobsRequest = _reflection.GeneratedProtocolMessageType('jobsRequest', (_message.Message,), {
+  'DESCRIPTOR' : _JOBSREQUEST,
+  '__module__' : 'switch_pb2'
+  # @@protoc_insertion_point(class_scope:switch.jobsRequest)
+  })
+_sym_db.RegisterMessage(jobsRequest)
+
+jobList = _reflection.GeneratedProtocolMessageType('jobList', (_message.Message,), {
+  'DESCRIPTOR' : _JOBLIST,
+  '__module__' : 'switch_pb2'
+  # @@protoc_insertion_point(class_scope:switch.jobList)
+  })
+_sym_db.RegisterMessage(jobList)
+
 
 DESCRIPTOR._options = None
+_JOB_IPTRANSFERENTRY._options = None
 
 _CHANNEL = _descriptor.ServiceDescriptor(
   name='Channel',
@@ -127,8 +652,8 @@ _CHANNEL = _descriptor.ServiceDescriptor(
   index=0,
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_start=119,
-  serialized_end=171,
+  serialized_start=795,
+  serialized_end=1156,
   methods=[
   _descriptor.MethodDescriptor(
     name='fetch',
@@ -140,6 +665,66 @@ _CHANNEL = _descriptor.ServiceDescriptor(
     serialized_options=None,
     create_key=_descriptor._internal_create_key,
   ),
+  _descriptor.MethodDescriptor(
+    name='fetchBatch',
+    full_name='switch.Channel.fetchBatch',
+    index=1,
+    containing_service=None,
+    input_type=_BATCHREQUEST,
+    output_type=_BATCHREPLY,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='control',
+    full_name='switch.Channel.control',
+    index=2,
+    containing_service=None,
+    input_type=_REQUEST,
+    output_type=_REPLY,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='getClock',
+    full_name='switch.Channel.getClock',
+    index=3,
+    containing_service=None,
+    input_type=_CLOCKREQUEST,
+    output_type=_CLOCKREPLY,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='registerJob',
+    full_name='switch.Channel.registerJob',
+    index=4,
+    containing_service=None,
+    input_type=_JOB,
+    output_type=_JOBREPLY,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='removeJob',
+    full_name='switch.Channel.removeJob',
+    index=5,
+    containing_service=None,
+    input_type=_JOB,
+    output_type=_JOBREPLY,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='listJobs',
+    full_name='switch.Channel.listJobs',
+    index=6,
+    containing_service=None,
+    input_type=_JOBSREQUEST,
+    output_type=_JOBLIST,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
 ])
 _sym_db.RegisterServiceDescriptor(_CHANNEL)
 
@@ -16,6 +16,36 @@ class ChannelStub(object):
                 request_serializer=switch__pb2.request.SerializeToString,
                 response_deserializer=switch__pb2.reply.FromString,
                 )
+        self.fetchBatch = channel.unary_unary(
+                '/switch.Channel/fetchBatch',
+                request_serializer=switch__pb2.batchRequest.SerializeToString,
+                response_deserializer=switch__pb2.batchReply.FromString,
+                )
+        self.control = channel.stream_stream(
+                '/switch.Channel/control',
+                request_serializer=switch__pb2.request.SerializeToString,
+                response_deserializer=switch__pb2.reply.FromString,
+                )
+        self.getClock = channel.unary_unary(
+                '/switch.Channel/getClock',
+                request_serializer=switch__pb2.clockRequest.SerializeToString,
+                response_deserializer=switch__pb2.clockReply.FromString,
+                )
+        self.registerJob = channel.unary_unary(
+                '/switch.Channel/registerJob',
+                request_serializer=switch__pb2.job.SerializeToString,
+                response_deserializer=switch__pb2.jobReply.FromString,
+                )
+        self.removeJob = channel.unary_unary(
+                '/switch.Channel/removeJob',
+                request_serializer=switch__pb2.job.SerializeToString,
+                response_deserializer=switch__pb2.jobReply.FromString,
+                )
+        self.listJobs = channel.unary_unary(
+                '/switch.Channel/listJobs',
+                request_serializer=switch__pb2.jobsRequest.SerializeToString,
+                response_deserializer=switch__pb2.jobList.FromString,
+                )
 
 class ChannelServicer(object):
     def fetch(self, request, context):
@@ -25,6 +55,48 @@ class ChannelServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def fetchBatch(self, request, context):
+        """ccp agent fetches new rates of all its flows in one call
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def control(self, request_iterator, context):
+        """ccp agent keeps one stream open, pushes reports and receives rate updates
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def getClock(self, request, context):
+        """ccp agent reads the switch slot clock when it connects
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def registerJob(self, request, context):
+        """a job registers its flows at launch, replacing those of a job with the same name
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def removeJob(self, request, context):
+        """a job removes its flows when it finishes, by name
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def listJobs(self, request, context):
+        """ccp agent reads the registered jobs to learn flows missing from its tables
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ChannelServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -33,6 +105,36 @@ def add_ChannelServicer_to_server(servicer, server):
                     request_deserializer=switch__pb2.request.FromString,
                     response_serializer=switch__pb2.reply.SerializeToString,
             ),
+            'fetchBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.fetchBatch,
+                    request_deserializer=switch__pb2.batchRequest.FromString,
+                    response_serializer=switch__pb2.batchReply.SerializeToString,
+            ),
+            'control': grpc.stream_stream_rpc_method_handler(
+                    servicer.control,
+                    request_deserializer=switch__pb2.request.FromString,
+                    response_serializer=switch__pb2.reply.SerializeToString,
+            ),
+            'getClock': grpc.unary_unary_rpc_method_handler(
+                    servicer.getClock,
+                    request_deserializer=switch__pb2.clockRequest.FromString,
+                    response_serializer=switch__pb2.clockReply.SerializeToString,
+            ),
+            'registerJob': grpc.unary_unary_rpc_method_handler(
+                    servicer.registerJob,
+                    request_deserializer=switch__pb2.job.FromString,
+                    response_serializer=switch__pb2.jobReply.SerializeToString,
+            ),
+            'removeJob': grpc.unary_unary_rpc_method_handler(
+                    servicer.removeJob,
+                    request_deserializer=switch__pb2.job.FromString,
+                    response_serializer=switch__pb2.jobReply.SerializeToString,
+            ),
+            'listJobs': grpc.unary_unary_rpc_method_handler(
+                    servicer.listJobs,
+                    request_deserializer=switch__pb2.jobsRequest.FromString,
+                    response_serializer=switch__pb2.jobList.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'switch.Channel', rpc_method_handlers)
@@ -57,3 +159,105 @@ class Channel(object):
             switch__pb2.reply.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def fetchBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/switch.Channel/fetchBatch',
+            switch__pb2.batchRequest.SerializeToString,
+            switch__pb2.batchReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def control(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/switch.Channel/control',
+            switch__pb2.request.SerializeToString,
+            switch__pb2.reply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def getClock(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/switch.Channel/getClock',
+            switch__pb2.clockRequest.SerializeToString,
+            switch__pb2.clockReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def registerJob(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/switch.Channel/registerJob',
+            switch__pb2.job.SerializeToString,
+            switch__pb2.jobReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def removeJob(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/switch.Channel/removeJob',
+            switch__pb2.job.SerializeToString,
+            switch__pb2.jobReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def listJobs(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/switch.Channel/listJobs',
+            switch__pb2.jobsRequest.SerializeToString,
+            switch__pb2.jobList.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
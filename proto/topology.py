@@ -0,0 +1,160 @@
+"""
+    Topology of the fabric, and the link paths of host pairs computed from it.
+
+    Links are numbered like link_id_tabel, one id per cable. Hosts are the nodes with a single
+    link, attached to their top-of-rack switch. Between switches a path takes directed ids
+    above the cable ids instead (fabric links), so only transmissions crossing a spine in the
+    same direction share it. A topology is built as
+        fattree:K               k-ary fat-tree, hosts 10.pod.edge.(2..k/2+1)
+        leafspine:L,S,H         L leaves, S spines, H hosts per leaf, hosts 10.1.leaf.(1..H)
+        <file>                  edge list, one "node node [link id]" per line, # comments
+    e.g. testbed.edges is the single-switch star of utils_p1p1.
+"""
+import zlib
+import collections
+import numpy as np
+
+
+class Topology():
+    def __init__(self) -> None:
+        self.adj = collections.defaultdict(list) # node -> [(neighbour, link id)]
+        self.num_links = 0
+
+    # link ids follow the order links are added, unless given
+    def add_link(self, u, v, link=None):
+        link = self.num_links if link is None else link
+        self.adj[u].append((v, link))
+        self.adj[v].append((u, link))
+        self.num_links = max(self.num_links, link + 1)
+
+    def hosts(self):
+        return [node for node, links in self.adj.items() if len(links) == 1]
+
+
+def fat_tree(k):
+    topo = Topology()
+    half = k // 2
+    for pod in range(k):
+        for e in range(half):
+            edge = "edge_%d_%d" % (pod, e)
+            for h in range(half):
+                topo.add_link("10.%d.%d.%d" % (pod, e, h + 2), edge)
+            for a in range(half):
+                topo.add_link(edge, "agg_%d_%d" % (pod, a))
+        for a in range(half):
+            for c in range(half):
+                topo.add_link("agg_%d_%d" % (pod, a), "core_%d" % (a * half + c))
+    return topo
+
+
+def leaf_spine(leaves, spines, hosts_per_leaf):
+    topo = Topology()
+    for l in range(leaves):
+        for h in range(hosts_per_leaf):
+            topo.add_link("10.1.%d.%d" % (l, h + 1), "leaf_%d" % l)
+        for s in range(spines):
+            topo.add_link("leaf_%d" % l, "spine_%d" % s)
+    return topo
+
+
+def load_edges(path):
+    topo = Topology()
+    with open(path) as f:
+        for line in f:
+            fields = line.split("#")[0].split()
+            if fields:
+                topo.add_link(fields[0], fields[1], int(fields[2]) if len(fields) > 2 else None)
+    return topo
+
+
+def load_topology(spec):
+    kind, _, params = spec.partition(":")
+    if kind == "fattree":
+        return fat_tree(int(params))
+    if kind == "leafspine":
+        return leaf_spine(*[int(p) for p in params.split(",")])
+    return load_edges(spec)
+
+
+class PathTable():
+    """
+        Shortest paths of every host pair, precomputed per pair of top-of-rack switches into
+        dense arrays, up to `ways` equal-cost paths each. A host pair takes one of them by ECMP
+        hash of its ips, and a lookup only reads the links of that path.
+    """
+    def __init__(self, topo, ways=8):
+        hosts = topo.hosts()
+        self.base = topo.num_links # directed fabric link ids start here
+        self.index = {host: i for i, host in enumerate(hosts)}
+        # host -> link to its top-of-rack switch, and that switch
+        self.uplink = np.array([topo.adj[host][0][1] for host in hosts], dtype=np.int32)
+        tors = sorted({topo.adj[host][0][0] for host in hosts})
+        tor_index = {tor: i for i, tor in enumerate(tors)}
+        self.tor = np.array([tor_index[topo.adj[host][0][0]] for host in hosts], dtype=np.int32)
+
+        found = [[self.equal_cost_paths(preds, dst, ways) for dst in tors]
+                 for preds in (self.bfs(topo, src, set(hosts), self.base) for src in tors)]
+        longest = max((len(p[0]) for row in found for p in row if p), default=0)
+        # [src tor, dst tor, way, hop] -> link id, and the hop count / number of ways of each tor pair
+        self.paths = np.full((len(tors), len(tors), ways, max(longest, 1)), -1, dtype=np.int32)
+        self.hops = np.zeros((len(tors), len(tors)), dtype=np.int32)
+        self.ways = np.zeros((len(tors), len(tors)), dtype=np.int32)
+        for s, row in enumerate(found):
+            for d, paths in enumerate(row):
+                self.ways[s, d] = len(paths)
+                self.hops[s, d] = len(paths[0]) if paths else 0
+                for w, path in enumerate(paths):
+                    self.paths[s, d, w, :len(path)] = path
+
+    # predecessors of every switch on the shortest paths from src, with the directed id of the link
+    # from each, hosts are not crossed
+    @staticmethod
+    def bfs(topo, src, hosts, base):
+        dist = {src: 0}
+        preds = {src: []}
+        frontier = [src]
+        while frontier:
+            nxt = []
+            for u in frontier:
+                for v, link in topo.adj[u]:
+                    if v in hosts:
+                        continue
+                    if v not in dist:
+                        dist[v] = dist[u] + 1
+                        preds[v] = []
+                        nxt.append(v)
+                    if dist[v] == dist[u] + 1:
+                        preds[v].append((u, base + 2 * link + (u > v)))
+            frontier = nxt
+        return preds
+
+    # up to `ways` shortest paths ending at dst, as link ids from the source on
+    @staticmethod
+    def equal_cost_paths(preds, dst, ways):
+        if dst not in preds:
+            return []
+        paths = []
+        stack = [(dst, [])]
+        while stack and len(paths) < ways:
+            node, suffix = stack.pop()
+            if not preds[node]:
+                paths.append(suffix)
+                continue
+            for u, link in reversed(preds[node]):
+                stack.append((u, [link] + suffix))
+        return paths
+
+    def fabric(self, link):
+        return link >= self.base
+
+    def __contains__(self, host):
+        return host in self.index
+
+    # link ids from srcip to dstip
+    def path(self, srcip, dstip):
+        i, j = self.index[srcip], self.index[dstip]
+        s, d = self.tor[i], self.tor[j]
+        if self.ways[s, d] == 0:
+            raise KeyError("no path from %s to %s" % (srcip, dstip))
+        way = zlib.crc32(("%s-%s" % (srcip, dstip)).encode()) % int(self.ways[s, d])
+        return [int(self.uplink[i])] + self.paths[s, d, way, :self.hops[s, d]].tolist() + [int(self.uplink[j])]